@@ -0,0 +1,411 @@
+"""
+Pricing and screening micro-benchmarks
+
+Times the scenario analyzer, risk calculator, filters, strategy screens and
+iron condor search on synthetic option chains, writes the results as JSON and
+reports how they compare with a stored baseline. Baselines are machine
+specific, so slowdowns only fail the run (exit status 1) when --check is
+given. SPEEDUP_CHECKS pair optimized code paths with a reference on the same
+input; their ratios are measured within the run and fail it when they drop
+below the minimum.
+
+Usage:
+    python benchmarks/run_benchmarks.py                      # run and report
+    python benchmarks/run_benchmarks.py --check              # fail on regressions
+    python benchmarks/run_benchmarks.py --sizes 1000 10000   # smaller run
+    python benchmarks/run_benchmarks.py --update-baseline    # record a new baseline
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+TOOL_DIR = os.path.join(REPO_DIR, 'options pricing tool')
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+DEFAULT_SIZES = [1000, 10000, 100000]
+# (optimized benchmark, reference on the same input, minimum speedup, smallest size checked).
+# Both sides run on the same machine in the same run, so unlike the baseline these hold anywhere.
+SPEEDUP_CHECKS = [
+    ('scenario.calculate_profit_potential_approximation', 'scenario.calculate_profit_potential_full_grid', 4.0, 1000),
+    ('strategies.find_iron_condors', 'strategies.find_iron_condors_exhaustive', 1.5, 100000),
+]
+
+sys.path.insert(0, REPO_DIR)
+
+from simple_scenario_analyzer import SimpleScenarioAnalyzer  # noqa: E402
+
+def load_tool_module(filename: str, name: str, **namespace):
+    """
+    Load a module from the 'options pricing tool' directory
+
+    The file names there are not importable, and some modules expect names
+    from sibling files (e.g. YahooOptionsAPI) to already be in scope, so those
+    can be passed in as keyword arguments.
+    """
+    spec = importlib.util.spec_from_file_location(name, os.path.join(TOOL_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    module.__dict__.update(namespace)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def make_synthetic_chain(n: int, seed: int = 42, underlying_price: float = 100.0) -> pd.DataFrame:
+    """Build a synthetic options chain with the columns used across the project"""
+    rng = np.random.default_rng(seed)
+    strikes = np.round(underlying_price * rng.uniform(0.6, 1.4, n), 1)
+    is_call = rng.random(n) < 0.5
+    dte = rng.integers(1, 120, n)
+    iv = rng.uniform(0.1, 0.9, n)
+    mid = np.maximum(
+        np.where(is_call, underlying_price - strikes, strikes - underlying_price), 0
+    ) + underlying_price * iv * np.sqrt(dte / 365) * 0.4
+    spread = mid * rng.uniform(0.01, 0.1, n)
+    moneyness = np.log(underlying_price / strikes)
+
+    return pd.DataFrame({
+        'symbol': 'SYN',
+        'strike_price': strikes,
+        'underlying_price': underlying_price,
+        'option_type': np.where(is_call, 'CALL', 'PUT'),
+        'bid': mid - spread / 2,
+        'ask': mid + spread / 2,
+        'last_price': mid,
+        'volume': rng.integers(0, 5000, n),
+        'open_interest': rng.integers(0, 20000, n),
+        'implied_volatility': iv,
+        'historical_volatility_30d': iv * rng.uniform(0.7, 1.3, n),
+        'delta': np.where(is_call, 1, -1) * np.clip(0.5 + moneyness * 2, 0.01, 0.99),
+        'gamma': rng.uniform(0, 0.1, n),
+        'theta': -rng.uniform(0, 0.2, n),
+        'vega': rng.uniform(0, 0.3, n),
+        'days_to_expiration': dte,
+        'expiration_date': pd.Timestamp(datetime.now().date()) + pd.to_timedelta(dte, unit='D'),
+    })
+
+def chain_to_scenario_options(chain: pd.DataFrame) -> List[dict]:
+    """Convert a synthetic chain to the dictionaries SimpleScenarioAnalyzer expects"""
+    return [
+        {
+            'strike': strike,
+            'expiration': dte / 365.0,
+            'implied_volatility': iv,
+            'current_option_price': price,
+            'option_type': option_type.lower()
+        }
+        for strike, dte, iv, price, option_type in zip(
+            chain['strike_price'], chain['days_to_expiration'], chain['implied_volatility'],
+            chain['last_price'], chain['option_type'])
+    ]
+
+def exhaustive_iron_condors(screener, chain: pd.DataFrame, underlying_price: float, top_k: int) -> np.ndarray:
+    """
+    Reference for find_iron_condors: the same credit spreads, but every put
+    spread is scored against every call spread and all scores are sorted
+    (no credit pruning, no bounded heap). Returns the best top_k scores.
+    """
+    filters = screener.templates['iron_condor'].filters
+    chain = chain[chain['days_to_expiration'].between(filters['min_dte'], filters['max_dte'])]
+    min_width = filters['min_wing_width'] * underlying_price
+    scores = [np.empty(0)]
+    for _, expiry_chain in chain.groupby('expiration_date', sort=False):
+        option_type = expiry_chain['option_type'].str.upper()
+        puts = screener._credit_spreads(
+            expiry_chain[option_type == 'PUT'], underlying_price, filters, min_width, np.inf, is_put=True)
+        calls = screener._credit_spreads(
+            expiry_chain[option_type == 'CALL'], underlying_price, filters, min_width, np.inf, is_put=False)
+        credit = puts['credit'][:, None] + calls['credit'][None, :]
+        max_loss = np.maximum(puts['width'][:, None], calls['width'][None, :]) - credit
+        probability = 1 - puts['short_delta'][:, None] - calls['short_delta'][None, :]
+        valid = ((credit >= filters['min_credit']) & (max_loss > 0)
+                 & (puts['short_strike'][:, None] < calls['short_strike'][None, :]))
+        scores.append((probability * credit / np.where(valid, max_loss, 1.0))[valid])
+    return np.sort(np.concatenate(scores))[::-1][:top_k]
+
+def build_benchmarks(chain: pd.DataFrame, modules: Dict) -> Dict[str, Callable[[], object]]:
+    """Return the benchmark callables for one synthetic chain"""
+    analyzer = SimpleScenarioAnalyzer()
+    underlying_price = float(chain['underlying_price'].iloc[0])
+    new_price = underlying_price * 1.05
+    scenario_options = chain_to_scenario_options(chain)
+    is_call = (chain['option_type'] == 'CALL').to_numpy()
+
+    risk_calculator = modules['risk'].OptionsRiskCalculator()
+    covered_calls = [
+        {'strike': strike, 'premium': premium, 'type': 'call'}
+        for strike, premium in zip(chain['strike_price'], chain['last_price'])
+    ]
+    dte = [int(d) for d in chain['days_to_expiration']]
+    covered_call_legs = [
+        [{'type': 'stock', 'quantity': 1}, {**position, 'quantity': -1}]
+        for position in covered_calls
+    ]
+    filters = modules['filters']
+    filter_params = filters.FilterParameters(min_volume=100, min_open_interest=500, max_dte=60)
+    screener = modules['screener'].IntegratedOptionsScreener()
+    strategy_screener = modules['strategies'].OptionsStrategyScreener()
+    dense_grid = {
+        'scenario_prices': underlying_price * (1 + np.arange(-2, 2.001, 0.05) / 100),
+        'strikes': chain['strike_price'].to_numpy(),
+        'expirations': np.full(len(chain), 45 / 365.0),
+        'implied_vols': chain['implied_volatility'].to_numpy(),
+        'option_types': is_call,
+        'current_option_prices': chain['last_price'].to_numpy(),
+    }
+
+    def black_scholes():
+        for option in scenario_options:
+            analyzer.black_scholes(
+                S=new_price, K=option['strike'], T=option['expiration'],
+                r=analyzer.risk_free_rate, sigma=option['implied_volatility'],
+                option_type=option['option_type'])
+
+    def profit_potential():
+        for option in scenario_options:
+            analyzer.calculate_profit_potential(underlying_price, new_price, option)
+
+    def profit_potential_batch():
+        analyzer.calculate_profit_potential_batch(
+            scenario_prices=[new_price],
+            strikes=chain['strike_price'].to_numpy(),
+            expirations=chain['days_to_expiration'].to_numpy() / 365.0,
+            implied_vols=chain['implied_volatility'].to_numpy(),
+            option_types=is_call,
+            current_option_prices=chain['last_price'].to_numpy())
+
+    def profit_potential_approximation():
+        # A dense grid over one expiration date, the way /api/analyze batches contracts
+        analyzer.calculate_profit_potential_batch(**dense_grid, current_price=underlying_price)
+
+    def profit_potential_full_grid():
+        # The same grid fully repriced: the reference for the approximation's speedup
+        analyzer.calculate_profit_potential_batch(**dense_grid)
+
+    def american_price_batch():
+        analyzer.american_price_batch(
+            S=new_price,
+            K=chain['strike_price'].to_numpy(),
+            T=chain['days_to_expiration'].to_numpy() / 365.0,
+            sigma=chain['implied_volatility'].to_numpy(),
+            is_call=is_call)
+
+    def implied_volatility_batch():
+        analyzer.implied_volatility_batch(
+            option_prices=(chain['bid'].to_numpy() + chain['ask'].to_numpy()) / 2,
+            S=underlying_price,
+            K=chain['strike_price'].to_numpy(),
+            T=chain['days_to_expiration'].to_numpy() / 365.0,
+            is_call=is_call)
+
+    def risk_metrics():
+        for position, days in zip(covered_calls, dte):
+            risk_calculator.calculate_all_metrics(
+                'covered_call', [position], underlying_price, days, 0.3)
+
+    def strategy_metrics_batch():
+        risk_calculator.calculate_strategy_metrics_batch(
+            covered_call_legs, underlying_price, dte, 0.3)
+
+    def score_candidates_batch():
+        premiums = chain['last_price'].to_numpy()
+        risk_calculator.score_candidates_batch(
+            underlying_price,
+            lower_break_even=underlying_price - premiums,
+            upper_break_even=np.inf,
+            max_profit=chain['strike_price'].to_numpy() - underlying_price + premiums,
+            max_loss=underlying_price - premiums,
+            days_to_expiration=chain['days_to_expiration'].to_numpy(),
+            volatility=chain['implied_volatility'].to_numpy())
+
+    def apply_all_filters():
+        filters.OptionsFilters.apply_all_filters(chain, filter_params)
+
+    def strategy_screens():
+        screener._screen_covered_calls(chain, underlying_price)
+        screener._screen_cash_secured_puts(chain, underlying_price)
+
+    def iron_condors():
+        strategy_screener.find_iron_condors(chain, underlying_price, top_k=20)
+
+    def iron_condors_exhaustive():
+        exhaustive_iron_condors(strategy_screener, chain, underlying_price, top_k=20)
+
+    return {
+        'scenario.black_scholes': black_scholes,
+        'scenario.calculate_profit_potential': profit_potential,
+        'scenario.calculate_profit_potential_batch': profit_potential_batch,
+        'scenario.calculate_profit_potential_approximation': profit_potential_approximation,
+        'scenario.calculate_profit_potential_full_grid': profit_potential_full_grid,
+        'scenario.american_price_batch': american_price_batch,
+        'scenario.implied_volatility_batch': implied_volatility_batch,
+        'risk.calculate_all_metrics': risk_metrics,
+        'risk.calculate_strategy_metrics_batch': strategy_metrics_batch,
+        'risk.score_candidates_batch': score_candidates_batch,
+        'filters.apply_all_filters': apply_all_filters,
+        'screener.strategy_screens': strategy_screens,
+        'strategies.find_iron_condors': iron_condors,
+        'strategies.find_iron_condors_exhaustive': iron_condors_exhaustive,
+    }
+
+def time_benchmark(func: Callable[[], object], repeat: int, max_time: float) -> Dict[str, float]:
+    """Run func up to `repeat` times (stopping early after max_time seconds) and keep the best time"""
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < repeat:
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+        if time.perf_counter() - started > max_time:
+            break
+    return {'seconds': min(timings), 'runs': len(timings)}
+
+def run(sizes: List[int], repeat: int, max_time: float, only: List[str] = None) -> Dict:
+    yahoo = load_tool_module('yahoo-finance-connector.py', 'yahoo_finance_connector')
+    modules = {
+        'risk': load_tool_module('options-risk-metrics.py', 'options_risk_metrics'),
+        'filters': load_tool_module('options-filters.py', 'options_filters'),
+        'screener': load_tool_module('integrated-options-screener.py', 'integrated_options_screener',
+                                     YahooOptionsAPI=yahoo.YahooOptionsAPI),
+        'strategies': load_tool_module('options-strategy-templates.py', 'options_strategy_templates'),
+    }
+
+    results = {}
+    for size in sizes:
+        chain = make_synthetic_chain(size)
+        for name, func in build_benchmarks(chain, modules).items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            key = f"{name}[{size}]"
+            result = time_benchmark(func, repeat, max_time)
+            result['per_contract_us'] = result['seconds'] / size * 1e6
+            results[key] = result
+            print(f"{key:<55} {result['seconds'] * 1000:>12.2f} ms  "
+                  f"{result['per_contract_us']:>10.3f} us/contract")
+
+    # How and where the numbers were taken; timings are only comparable on a matching host
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'method': 'best wall-clock time (time.perf_counter) of up to `repeat` runs, '
+                  'stopping after `max_time` seconds',
+        'sizes': list(sizes),
+        'repeat': repeat,
+        'max_time': max_time,
+        'results': results,
+    }
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Return a description of every benchmark slower than baseline * (1 + threshold)"""
+    regressions = []
+    for key, result in report['results'].items():
+        reference = baseline.get('results', {}).get(key)
+        if reference is None:
+            continue
+        ratio = result['seconds'] / reference['seconds']
+        if ratio > 1 + threshold:
+            regressions.append(
+                f"{key}: {result['seconds'] * 1000:.2f} ms vs baseline "
+                f"{reference['seconds'] * 1000:.2f} ms ({ratio:.2f}x)")
+    return regressions
+
+def check_speedups(report: Dict) -> List[str]:
+    """Print the measured SPEEDUP_CHECKS ratios and return a description of each one below its minimum"""
+    failures = []
+    for fast, reference, minimum, min_size in SPEEDUP_CHECKS:
+        for key, result in report['results'].items():
+            if not key.startswith(fast + '['):
+                continue
+            size = key[len(fast):]
+            reference_result = report['results'].get(reference + size)
+            if reference_result is None:
+                continue
+            speedup = reference_result['seconds'] / result['seconds']
+            print(f"{key:<55} {speedup:>8.1f}x faster than {reference}")
+            if int(size.strip('[]')) >= min_size and speedup < minimum:
+                failures.append(f"{key}: {speedup:.1f}x faster than {reference} (expected at least {minimum:.1f}x)")
+    return failures
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Synthetic chain sizes (number of contracts)')
+    parser.add_argument('--repeat', type=int, default=5, help='Maximum runs per benchmark (best is kept)')
+    parser.add_argument('--max-time', type=float, default=3.0,
+                        help='Stop repeating a benchmark after this many seconds')
+    parser.add_argument('--only', nargs='+', help='Only run benchmarks whose name contains one of these')
+    parser.add_argument('--output', help='Write the results JSON to this file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='Allowed slowdown relative to baseline (0.5 = 50%%)')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Write the results to the baseline file instead of comparing')
+    parser.add_argument('--check', action='store_true',
+                        help='Exit with status 1 when a benchmark regresses (baseline from this machine only)')
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.repeat, args.max_time, args.only)
+
+    print()
+    speedup_failures = check_speedups(report)
+    if speedup_failures:
+        # Unlike baseline regressions these compare two runs on this machine, so they always fail
+        print(f"\n{len(speedup_failures)} speedup(s) below their minimum:")
+        for failure in speedup_failures:
+            print(f"  {failure}")
+    status = 1 if speedup_failures else 0
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+    if args.update_baseline:
+        baseline = {'results': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        # Partial runs (--only, --sizes) merge into the existing baseline
+        sizes = sorted(set(baseline.get('sizes', [])) | set(report['sizes']))
+        baseline.update({k: v for k, v in report.items() if k != 'results'}, sizes=sizes)
+        baseline['results'].update(report['results'])
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+        return status
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return status
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(report, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        if baseline.get('platform') != report['platform'] or baseline.get('python') != report['python']:
+            print(f"  (baseline recorded on {baseline.get('platform')}, {baseline.get('cpu_count')} CPU(s), "
+                  f"Python {baseline.get('python')})")
+        return 1 if args.check else status
+
+    print(f"\nNo regressions beyond {args.threshold:.0%} of baseline")
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,27 @@
 import numpy as np
 from scipy.stats import norm
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from scipy.special import ndtr
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 import pandas as pd
+import os
+import sys
+
+# The shared simple_*.py modules live in the repository root; make them importable
+# when this script is run from its own directory
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.append(REPO_DIR)
+
+from simple_greeks import HIGHER_ORDER_GREEK_NAMES, black_scholes_greeks
+
+# Greeks reported per position by AdvancedRiskCalculator._calculate_position_greeks
+POSITION_GREEK_NAMES = ['delta', 'gamma', 'theta', 'vega'] + HIGHER_ORDER_GREEK_NAMES
+
+# Confidence levels reported by the historical-simulation VaR / ES
+VAR_CONFIDENCE_LEVELS = (0.95, 0.975, 0.99)
 
 @dataclass
 class AdvancedRiskMetrics:
@@ -15,12 +34,28 @@ class AdvancedRiskMetrics:
     gamma_exposure: float
     vanna_exposure: float
     charm_exposure: float
+    vomma_exposure: float = 0.0
+    speed_exposure: float = 0.0
+    # VaR / ES keyed by confidence level (see VAR_CONFIDENCE_LEVELS)
+    value_at_risk_by_level: Dict[float, float] = field(default_factory=dict)
+    expected_shortfall_by_level: Dict[float, float] = field(default_factory=dict)
+
+@dataclass
+class MonteCarloRiskResult:
+    value_at_risk: Dict[float, float]
+    expected_shortfall: Dict[float, float]
+    # (lower, upper) bounds of the estimates at ci_level
+    var_confidence_interval: Dict[float, Tuple[float, float]]
+    es_confidence_interval: Dict[float, Tuple[float, float]]
+    mean_pnl: float
+    n_paths: int
+    horizon_days: float
 
 class AdvancedRiskCalculator:
     def __init__(self, account_size: float, risk_free_rate: float = 0.05):
         self.account_size = account_size
         self.risk_free_rate = risk_free_rate
-        
+
     def calculate_advanced_metrics(
         self,
         strategy: str,
@@ -31,28 +66,34 @@ class AdvancedRiskCalculator:
     ) -> AdvancedRiskMetrics:
         """Calculate comprehensive risk metrics for position sizing and management"""
         
-        # Calculate Value at Risk (VaR) using historical simulation
-        var_95 = self._calculate_var(positions, historical_prices, confidence_level=0.95)
+        # Revalue every position at every historical price once; VaR, ES and Kelly share it
+        position_values, entry_values = self._revalue_positions(positions, historical_prices, volatility)
+        portfolio_values = position_values.sum(axis=1)
+        portfolio_pnl = portfolio_values - entry_values.sum()
         
-        # Calculate Expected Shortfall (Conditional VaR)
-        expected_shortfall = self._calculate_expected_shortfall(positions, historical_prices)
+        # Calculate Value at Risk (VaR) and Expected Shortfall (Conditional VaR) using historical simulation
+        var_by_level, es_by_level = self._calculate_tail_risk(portfolio_pnl, VAR_CONFIDENCE_LEVELS)
+        var_95 = var_by_level[0.95]
+        expected_shortfall = es_by_level[0.95]
         
         # Calculate optimal position size using Kelly Criterion
-        kelly_size = self._calculate_kelly_criterion(positions, historical_prices)
+        kelly_size = self._kelly_from_values(portfolio_values)
+        
+        # Calculate first- and higher-order Greeks for the whole book in one pass
+        greeks = self._calculate_higher_order_greeks(
+            positions, underlying_price, volatility
+        )
         
         # Calculate optimal exit points based on Greeks and time decay
-        exit_points = self._calculate_optimal_exits(positions, underlying_price, volatility)
+        exit_points = self._calculate_optimal_exits(
+            positions, underlying_price, volatility, var_by_level[0.99], greeks
+        )
         
         # Calculate position size recommendations
         position_size = self._calculate_position_size(
             var_95, kelly_size, strategy, underlying_price
         )
         
-        # Calculate higher-order Greeks
-        greeks = self._calculate_higher_order_greeks(
-            positions, underlying_price, volatility
-        )
-        
         return AdvancedRiskMetrics(
             value_at_risk=var_95,
             expected_shortfall=expected_shortfall,
@@ -62,68 +103,151 @@ class AdvancedRiskCalculator:
             risk_adjusted_return=self._calculate_risk_adjusted_return(positions),
             gamma_exposure=greeks['gamma'],
             vanna_exposure=greeks['vanna'],
-            charm_exposure=greeks['charm']
+            charm_exposure=greeks['charm'],
+            vomma_exposure=greeks['vomma'],
+            speed_exposure=greeks['speed'],
+            value_at_risk_by_level=var_by_level,
+            expected_shortfall_by_level=es_by_level
         )
 
+    def _revalue_positions(
+        self,
+        positions: list,
+        historical_prices: pd.DataFrame,
+        volatility: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Revalue every position at every historical closing price in one pass
+        
+        Positions are dicts with 'type' ('call'/'put'), 'strike', 'premium',
+        'days_to_expiration' and optionally 'quantity' (negative for short,
+        default 1) and 'implied_volatility' (defaults to volatility). Each is
+        priced with Black-Scholes at its remaining time to expiration.
+        
+        Returns (values, entry_values): a (history x position) matrix of
+        position values and the per-position entry value (quantity * premium).
+        """
+        close = historical_prices['close' if 'close' in historical_prices else 'Close']
+        return self._price_positions(positions, close.to_numpy(dtype=float), volatility)
+
+    def _price_positions(
+        self,
+        positions: list,
+        underlying_prices: np.ndarray,
+        volatility: float,
+        elapsed_days: float = 0.0
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Price every position at every underlying price, elapsed_days from now
+        
+        Returns a (price x position) value matrix and the per-position entry
+        value, as in _revalue_positions.
+        """
+        S = np.asarray(underlying_prices, dtype=float)[:, None]
+        
+        K = np.array([pos['strike'] for pos in positions], dtype=float)
+        T = (np.array([pos['days_to_expiration'] for pos in positions], dtype=float) - elapsed_days) / 365.0
+        sigma = np.array([pos.get('implied_volatility', volatility) for pos in positions], dtype=float)
+        quantity = np.array([pos.get('quantity', 1) for pos in positions], dtype=float)
+        premium = np.array([pos['premium'] for pos in positions], dtype=float)
+        is_call = np.array([pos['type'].lower() == 'call' for pos in positions])
+        
+        # Expired legs are worth intrinsic value
+        live = T > 0
+        T_ = np.where(live, T, 1.0)
+        sqrt_T = np.sqrt(T_)
+        d1 = (np.log(S / K) + (self.risk_free_rate + 0.5 * sigma**2) * T_) / (sigma * sqrt_T)
+        d2 = d1 - sigma * sqrt_T
+        discounted_K = K * np.exp(-self.risk_free_rate * T_)
+        # Puts by put-call parity, so the normal CDF is evaluated twice per cell instead of four times
+        call_prices = S * ndtr(d1) - discounted_K * ndtr(d2)
+        prices = np.where(is_call, call_prices, call_prices - S + discounted_K)
+        intrinsic = np.maximum(np.where(is_call, S - K, K - S), 0)
+        prices = np.where(live, prices, intrinsic)
+        
+        return quantity * prices, quantity * premium
+
+    def _calculate_tail_risk(
+        self,
+        pnl: np.ndarray,
+        confidence_levels=VAR_CONFIDENCE_LEVELS
+    ) -> Tuple[Dict[float, float], Dict[float, float]]:
+        """VaR and Expected Shortfall of a P&L vector at each confidence level"""
+        levels = list(confidence_levels)
+        var = np.percentile(pnl, [(1 - level) * 100 for level in levels])
+        sorted_pnl = np.sort(pnl)
+        # Number of scenarios strictly below each VaR, and the running sums to average them
+        tail_counts = np.searchsorted(sorted_pnl, var, side='left')
+        tail_sums = np.concatenate([[0.0], np.cumsum(sorted_pnl)])[tail_counts]
+        
+        var_by_level = {}
+        es_by_level = {}
+        for level, level_var, count, total in zip(levels, var, tail_counts, tail_sums):
+            var_by_level[level] = float(level_var)
+            es_by_level[level] = float(total / count) if count else float(level_var)
+        return var_by_level, es_by_level
+
+    def _kelly_from_values(self, portfolio_values: np.ndarray) -> float:
+        """Kelly fraction from day-over-day returns of the portfolio value"""
+        prev_values = portfolio_values[:-1]
+        changes = np.diff(portfolio_values)
+        usable = prev_values != 0
+        if not usable.any():
+            return 0.0
+        returns = changes[usable] / prev_values[usable]
+        
+        wins = returns[returns > 0]
+        losses = returns[returns < 0]
+        win_prob = len(wins) / len(returns)
+        avg_win = wins.mean() if len(wins) else 0
+        avg_loss = abs(losses.mean()) if len(losses) else 0
+        
+        if avg_loss == 0 or avg_win == 0:
+            return 0.0
+        
+        return float((win_prob / avg_loss) - ((1 - win_prob) / avg_win))
+
     def _calculate_var(
         self,
         positions: list,
         historical_prices: pd.DataFrame,
-        confidence_level: float
+        confidence_level: float,
+        volatility: float = 0.3
     ) -> float:
         """Calculate Value at Risk using historical simulation"""
-        position_values = []
-        for price in historical_prices['close']:
-            total_value = sum(self._calculate_position_value(pos, price) 
-                            for pos in positions)
-            position_values.append(total_value)
-            
-        return np.percentile(position_values, (1 - confidence_level) * 100)
+        values, entry_values = self._revalue_positions(positions, historical_prices, volatility)
+        var_by_level, _ = self._calculate_tail_risk(values.sum(axis=1) - entry_values.sum(), [confidence_level])
+        return var_by_level[confidence_level]
 
     def _calculate_expected_shortfall(
         self,
         positions: list,
-        historical_prices: pd.DataFrame
+        historical_prices: pd.DataFrame,
+        confidence_level: float = 0.95,
+        volatility: float = 0.3
     ) -> float:
         """Calculate Expected Shortfall (Conditional VaR)"""
-        var_95 = self._calculate_var(positions, historical_prices, 0.95)
-        position_values = []
-        for price in historical_prices['close']:
-            total_value = sum(self._calculate_position_value(pos, price) 
-                            for pos in positions)
-            if total_value < var_95:
-                position_values.append(total_value)
-                
-        return np.mean(position_values) if position_values else var_95
+        values, entry_values = self._revalue_positions(positions, historical_prices, volatility)
+        _, es_by_level = self._calculate_tail_risk(values.sum(axis=1) - entry_values.sum(), [confidence_level])
+        return es_by_level[confidence_level]
 
     def _calculate_kelly_criterion(
         self,
         positions: list,
-        historical_prices: pd.DataFrame
+        historical_prices: pd.DataFrame,
+        volatility: float = 0.3
     ) -> float:
         """Calculate Kelly Criterion for optimal position sizing"""
-        returns = []
-        for i in range(1, len(historical_prices)):
-            prev_value = sum(self._calculate_position_value(pos, historical_prices['close'][i-1]) 
-                           for pos in positions)
-            curr_value = sum(self._calculate_position_value(pos, historical_prices['close'][i]) 
-                           for pos in positions)
-            returns.append((curr_value - prev_value) / prev_value)
-            
-        win_prob = len([r for r in returns if r > 0]) / len(returns)
-        avg_win = np.mean([r for r in returns if r > 0]) if any(r > 0 for r in returns) else 0
-        avg_loss = abs(np.mean([r for r in returns if r < 0])) if any(r < 0 for r in returns) else 0
-        
-        if avg_loss == 0:
-            return 0
-            
-        return (win_prob / avg_loss) - ((1 - win_prob) / avg_win)
+        values, _ = self._revalue_positions(positions, historical_prices, volatility)
+        return self._kelly_from_values(values.sum(axis=1))
 
     def _calculate_optimal_exits(
         self,
         positions: list,
         underlying_price: float,
-        volatility: float
+        volatility: float,
+        var_99: float,
+        greeks: Dict[str, float]
     ) -> Dict[str, float]:
         """Calculate optimal exit points based on Greeks and time decay"""
         exits = {}
@@ -133,16 +257,20 @@ class AdvancedRiskCalculator:
         exits['profit_target'] = total_premium * 0.75  # Take profit at 75% of max profit
         
         # Stop loss based on VaR
-        exits['stop_loss'] = self._calculate_var(positions, pd.DataFrame(), 0.99)
+        exits['stop_loss'] = var_99
         
-        # Time-based exit using theta decay
-        total_theta = sum(self._calculate_theta(pos, underlying_price, volatility) 
-                         for pos in positions)
-        exits['time_exit_days'] = int(-total_premium / (2 * total_theta))  # Exit when theta decay accelerates
+        # Time-based exit using theta decay: days until half the net credit (premium
+        # received less premium paid) has decayed. Only meaningful when decay works
+        # toward the credit (short books collect theta, long books pay it).
+        net_credit = -sum(pos.get('quantity', 1) * pos['premium'] for pos in positions)
+        total_theta = greeks['theta']
+        if net_credit * total_theta > 0:
+            exits['time_exit_days'] = int(net_credit / (2 * total_theta))  # Exit when theta decay accelerates
+        else:
+            exits['time_exit_days'] = 0
         
         # Volatility-based exit
-        vega_exposure = sum(self._calculate_vega(pos, underlying_price, volatility) 
-                           for pos in positions)
+        vega_exposure = greeks['vega']
         exits['vol_exit_up'] = volatility * 1.2 if vega_exposure > 0 else volatility * 0.8
         exits['vol_exit_down'] = volatility * 0.8 if vega_exposure > 0 else volatility * 1.2
         
@@ -154,24 +282,33 @@ class AdvancedRiskCalculator:
         underlying_price: float,
         volatility: float
     ) -> Dict[str, float]:
-        """Calculate higher-order Greeks for advanced risk management"""
-        greeks = {'gamma': 0.0, 'vanna': 0.0, 'charm': 0.0}
-        
-        for pos in positions:
-            # Gamma calculation (rate of change of delta)
-            d1 = self._calculate_d1(pos, underlying_price, volatility)
-            gamma = self._calculate_gamma(pos, underlying_price, volatility, d1)
-            greeks['gamma'] += gamma
-            
-            # Vanna calculation (delta sensitivity to volatility)
-            vanna = self._calculate_vanna(pos, underlying_price, volatility, d1)
-            greeks['vanna'] += vanna
-            
-            # Charm calculation (delta sensitivity to time)
-            charm = self._calculate_charm(pos, underlying_price, volatility, d1)
-            greeks['charm'] += charm
-            
-        return greeks
+        """Calculate higher-order Greeks for advanced risk management (quantity-weighted book totals)"""
+        position_greeks = self._calculate_position_greeks(positions, underlying_price, volatility)
+        return {name: float(values.sum()) for name, values in position_greeks.items()}
+
+    def _calculate_position_greeks(
+        self,
+        positions: list,
+        underlying_price: float,
+        volatility: float
+    ) -> Dict[str, np.ndarray]:
+        """
+        First-, second- and third-order Black-Scholes Greeks for every position at once
+        
+        Values come from simple_greeks.black_scholes_greeks, per position
+        (quantity applied): theta and charm per day; vega, vanna and vomma per
+        1% volatility move; gamma and speed per $1.
+        Expired legs keep an intrinsic delta and zero for everything else.
+        """
+        S = float(underlying_price)
+        K = np.array([pos['strike'] for pos in positions], dtype=float)
+        T = np.array([pos['days_to_expiration'] for pos in positions], dtype=float) / 365.0
+        sigma = np.array([pos.get('implied_volatility', volatility) for pos in positions], dtype=float)
+        quantity = np.array([pos.get('quantity', 1) for pos in positions], dtype=float)
+        is_call = np.array([pos['type'].lower() == 'call' for pos in positions])
+        
+        greeks = black_scholes_greeks(S, K, T, sigma, is_call, r=self.risk_free_rate, higher_order=True)
+        return {name: quantity * greeks[name] for name in POSITION_GREEK_NAMES}
 
     def _calculate_position_size(
         self,
@@ -209,3 +346,177 @@ class AdvancedRiskCalculator:
         """Calculate risk-adjusted return metrics (Sharpe-like ratio for options)"""
         # Implementation specific to options positions
         pass
+
+def _simulate_pnl_chunk(engine, positions: list, underlying_price: float, volatility: float,
+                        seed: np.random.SeedSequence, n_paths: int) -> np.ndarray:
+    """
+    Process-pool entry point: simulate one chunk of paths and return its P&L
+    
+    This script is loaded by file path (its name is not importable), so the
+    pool must fork: spawn / forkserver children cannot import this function.
+    """
+    return engine._simulate_chunk(positions, underlying_price, volatility, seed, n_paths)
+
+class MonteCarloRiskEngine:
+    def __init__(
+        self,
+        calculator: AdvancedRiskCalculator,
+        n_paths: int = 1_000_000,
+        horizon_days: float = 1.0,
+        drift: float = 0.0,
+        jump_intensity: float = 0.0,
+        jump_mean: float = 0.0,
+        jump_std: float = 0.0,
+        antithetic: bool = True,
+        chunk_size: int = 100_000,
+        max_workers: int = 1,
+        seed: Optional[int] = None,
+        ci_level: float = 0.95
+    ):
+        """
+        Forward-looking VaR / ES by Monte Carlo simulation of the underlying
+        
+        The underlying follows GBM with optional Merton jumps (lognormal jump
+        sizes arriving at jump_intensity per year). Only the price at the
+        horizon matters for repricing, so it is sampled exactly in one step;
+        every position is then repriced with the calculator's vectorized
+        Black-Scholes pricer at its remaining time to expiration.
+        
+        Parameters:
+        - calculator: AdvancedRiskCalculator supplying the pricer and risk-free rate
+        - n_paths: Number of simulated paths
+        - horizon_days: Risk horizon in calendar days
+        - drift: Annual drift of the underlying (0 for a conservative VaR)
+        - jump_intensity, jump_mean, jump_std: Expected jumps per year, and the
+          mean / standard deviation of the log jump size
+        - antithetic: Pair every normal draw with its negation
+        - chunk_size: Paths simulated at once (bounds the path x position matrix)
+        - max_workers: Processes sharing the chunks (1 runs in-process). Workers
+          are forked, since this file cannot be imported by name; where fork is
+          unavailable (Windows) the chunks run in-process instead
+        - seed: Seed for reproducible results; each chunk gets its own child
+          SeedSequence, so results do not depend on max_workers
+        - ci_level: Confidence level of the VaR / ES confidence intervals
+        """
+        self.calculator = calculator
+        self.n_paths = n_paths
+        self.horizon_days = horizon_days
+        self.drift = drift
+        self.jump_intensity = jump_intensity
+        self.jump_mean = jump_mean
+        self.jump_std = jump_std
+        self.antithetic = antithetic
+        self.chunk_size = max(chunk_size - chunk_size % 2, 2)
+        self.max_workers = max(max_workers, 1)
+        self.seed = seed
+        self.ci_level = ci_level
+
+    def calculate(
+        self,
+        positions: list,
+        underlying_price: float,
+        volatility: float,
+        confidence_levels=VAR_CONFIDENCE_LEVELS
+    ) -> MonteCarloRiskResult:
+        """
+        Simulate the portfolio P&L at the horizon and estimate VaR / ES
+        
+        Positions use the same dicts as AdvancedRiskCalculator; P&L is measured
+        against their entry value (quantity * premium).
+        """
+        chunk_sizes = [self.chunk_size] * (self.n_paths // self.chunk_size)
+        if self.n_paths % self.chunk_size:
+            chunk_sizes.append(self.n_paths % self.chunk_size)
+        seeds = np.random.SeedSequence(self.seed).spawn(len(chunk_sizes))
+        
+        if self.max_workers == 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            chunks = [
+                self._simulate_chunk(positions, underlying_price, volatility, seed, n_paths)
+                for seed, n_paths in zip(seeds, chunk_sizes)
+            ]
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers,
+                                     mp_context=multiprocessing.get_context('fork')) as executor:
+                chunks = list(executor.map(
+                    _simulate_pnl_chunk,
+                    [self] * len(chunk_sizes),
+                    [positions] * len(chunk_sizes),
+                    [underlying_price] * len(chunk_sizes),
+                    [volatility] * len(chunk_sizes),
+                    seeds,
+                    chunk_sizes
+                ))
+        pnl = np.concatenate(chunks)
+        
+        var_by_level, es_by_level = self.calculator._calculate_tail_risk(pnl, confidence_levels)
+        var_ci, es_ci = self._confidence_intervals(pnl, var_by_level, es_by_level)
+        
+        return MonteCarloRiskResult(
+            value_at_risk=var_by_level,
+            expected_shortfall=es_by_level,
+            var_confidence_interval=var_ci,
+            es_confidence_interval=es_ci,
+            mean_pnl=float(pnl.mean()),
+            n_paths=len(pnl),
+            horizon_days=self.horizon_days
+        )
+
+    def _simulate_chunk(self, positions: list, underlying_price: float, volatility: float,
+                        seed: np.random.SeedSequence, n_paths: int) -> np.ndarray:
+        """Simulate n_paths terminal prices and return the portfolio P&L for each"""
+        rng = np.random.default_rng(seed)
+        h = self.horizon_days / 365.0
+        
+        n_draws = (n_paths + 1) // 2 if self.antithetic else n_paths
+        z = rng.standard_normal(n_draws)
+        jump_counts = rng.poisson(self.jump_intensity * h, n_draws) if self.jump_intensity else None
+        jump_z = rng.standard_normal(n_draws) if self.jump_intensity else None
+        if self.antithetic:
+            z = np.concatenate([z, -z])[:n_paths]
+            if jump_counts is not None:
+                jump_counts = np.concatenate([jump_counts, jump_counts])[:n_paths]
+                jump_z = np.concatenate([jump_z, -jump_z])[:n_paths]
+        
+        # Jump compensator keeps the expected growth at the drift
+        compensator = self.jump_intensity * (np.exp(self.jump_mean + 0.5 * self.jump_std**2) - 1)
+        log_return = (self.drift - compensator - 0.5 * volatility**2) * h + volatility * np.sqrt(h) * z
+        if jump_counts is not None:
+            log_return += jump_counts * self.jump_mean + np.sqrt(jump_counts) * self.jump_std * jump_z
+        terminal_prices = underlying_price * np.exp(log_return)
+        
+        values, entry_values = self.calculator._price_positions(
+            positions, terminal_prices, volatility, elapsed_days=self.horizon_days
+        )
+        return values.sum(axis=1) - entry_values.sum()
+
+    def _confidence_intervals(
+        self,
+        pnl: np.ndarray,
+        var_by_level: Dict[float, float],
+        es_by_level: Dict[float, float]
+    ) -> Tuple[Dict[float, Tuple[float, float]], Dict[float, Tuple[float, float]]]:
+        """
+        Asymptotic confidence intervals for the VaR and ES estimates
+        
+        VaR uses binomial bounds on the order statistics; ES uses the normal
+        approximation Var = (Var(tail) + p * (VaR - ES)^2) / (n * p). Antithetic
+        pairs are negatively correlated, so both are somewhat conservative.
+        """
+        n = len(pnl)
+        z = norm.ppf(0.5 + self.ci_level / 2)
+        sorted_pnl = np.sort(pnl)
+        var_ci = {}
+        es_ci = {}
+        for level, var in var_by_level.items():
+            p = 1 - level
+            half_width = z * np.sqrt(n * p * (1 - p))
+            lower_index = int(np.clip(np.floor(n * p - half_width), 0, n - 1))
+            upper_index = int(np.clip(np.ceil(n * p + half_width), 0, n - 1))
+            var_ci[level] = (float(sorted_pnl[lower_index]), float(sorted_pnl[upper_index]))
+            
+            es = es_by_level[level]
+            tail = sorted_pnl[sorted_pnl < var]
+            tail_variance = tail.var() if len(tail) > 1 else 0.0
+            es_se = np.sqrt((tail_variance + p * (var - es)**2) / (n * p))
+            es_ci[level] = (float(es - z * es_se), float(es + z * es_se))
+        return var_ci, es_ci
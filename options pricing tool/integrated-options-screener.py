@@ -1,9 +1,21 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
+import heapq
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+
+# Columns of the strategy screen result frames
+COVERED_CALL_COLUMNS = [
+    'strategy', 'strike', 'expiration', 'premium', 'static_return', 'max_return',
+    'implied_volatility', 'volume', 'open_interest'
+]
+CASH_SECURED_PUT_COLUMNS = [
+    'strategy', 'strike', 'expiration', 'premium', 'static_return', 'break_even',
+    'implied_volatility', 'volume', 'open_interest'
+]
 
 @dataclass
 class ScreenerResults:
@@ -12,9 +24,38 @@ class ScreenerResults:
     risk_metrics: Dict
     underlying_data: Dict
 
+@dataclass
+class UniverseScanResults:
+    # Every symbol's strategy matches (with their 'symbol'), grouped by strategy name and
+    # best static return first within each strategy
+    strategy_matches: List[Dict]
+    results: Dict[str, ScreenerResults] = field(default_factory=dict)
+    # Symbol -> error message for the symbols that could not be screened
+    errors: Dict[str, str] = field(default_factory=dict)
+
+def _screen_chain(symbol: str, chain: pd.DataFrame, current_price: float,
+                  underlying_data: Dict) -> ScreenerResults:
+    """
+    Run the strategy screens and risk metrics on one fetched chain (process pool entry point)
+    
+    This script is loaded by file path with its dependencies placed in its
+    namespace, so the pool must fork: spawn / forkserver children can neither
+    import this function nor rebuild YahooOptionsAPI.
+    """
+    # The screens never use the data manager, so workers skip creating one
+    screener = IntegratedOptionsScreener.__new__(IntegratedOptionsScreener)
+    return screener._screen_chain(symbol, chain, current_price, underlying_data)
+
 class IntegratedOptionsScreener:
-    def __init__(self):
-        self.data_manager = YahooOptionsAPI()
+    def __init__(self, data_manager=None, ticker_factory: Optional[Callable[[str], object]] = None):
+        """
+        Parameters:
+        - data_manager: YahooOptionsAPI (or compatible) used for every request
+        - ticker_factory: Market data provider hook for the default data manager
+          (e.g. a record/replay provider's ticker method); live yfinance data
+          when both are omitted
+        """
+        self.data_manager = data_manager or YahooOptionsAPI(ticker_factory=ticker_factory)
         
     def screen_for_strategies(self, symbol: str) -> ScreenerResults:
         """
@@ -23,57 +64,158 @@ class IntegratedOptionsScreener:
         # Fetch all necessary data
         try:
             # Get current data
-            ticker = yf.Ticker(symbol)
+            ticker = self.data_manager.ticker_factory(symbol)
             current_price = ticker.info['regularMarketPrice']
             options_chain = self.data_manager.get_options_chain(symbol)
             
             if options_chain.empty:
                 raise ValueError(f"No options data available for {symbol}")
-
-            # Screen for different strategies
-            strategies = []
-            
-            # Screen for covered calls
-            covered_calls = self._screen_covered_calls(
-                options_chain, current_price)
-            if covered_calls:
-                strategies.extend(covered_calls)
-            
-            # Screen for cash-secured puts
-            csps = self._screen_cash_secured_puts(
-                options_chain, current_price)
-            if csps:
-                strategies.extend(csps)
-                
-            # Calculate risk metrics
-            risk_metrics = self._calculate_risk_metrics(
-                options_chain, current_price)
             
-            # Get underlying data
-            underlying_data = {
-                'price': current_price,
-                'volume': ticker.info.get('volume'),
-                'market_cap': ticker.info.get('marketCap'),
-                'beta': ticker.info.get('beta')
-            }
-            
-            return ScreenerResults(
-                symbol=symbol,
-                strategy_matches=strategies,
-                risk_metrics=risk_metrics,
-                underlying_data=underlying_data
-            )
+            return self._screen_chain(
+                symbol, options_chain, current_price, self._underlying_data(ticker.info))
             
         except Exception as e:
             print(f"Error screening {symbol}: {str(e)}")
             return None
 
+    def scan_universe(self, symbols: List[str], max_expiry_count: Optional[int] = 3,
+                      process_workers: int = 1, top_n: Optional[int] = None) -> UniverseScanResults:
+        """
+        Screen a universe of symbols concurrently
+        
+        Quotes and chains are fetched by data_manager.max_workers threads that
+        all share data_manager.rate_limiter, so wall-clock time falls with the
+        worker count until the rate limit is reached. Each chain is screened as
+        soon as it arrives and its matches are collected as it finishes (into
+        a bounded heap per strategy when top_n is set); the rankings are sorted
+        once at the end. Covered call returns are relative to the stock price
+        and cash-secured put returns to the strike, so each strategy is ranked
+        separately. A symbol that fails is recorded in errors without stopping
+        the scan.
+        
+        Parameters:
+        - symbols: Underlying symbols to scan
+        - max_expiry_count: Number of nearest expirations to screen per symbol
+        - process_workers: Forked processes running the screens (1 screens
+          in-process, as does any count where fork is unavailable, e.g. Windows)
+        - top_n: Keep only the best top_n matches of each strategy (None keeps all)
+        """
+        scan = UniverseScanResults(strategy_matches=[])
+        screen_pool = None
+        if process_workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            screen_pool = ProcessPoolExecutor(max_workers=process_workers,
+                                              mp_context=multiprocessing.get_context('fork'))
+        
+        # Strategy -> plain list without top_n, otherwise a min-heap of
+        # (static_return, -arrival, match) holding the best top_n, so ties keep the earlier arrival
+        collected: Dict[str, list] = {}
+        arrival = 0
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.data_manager.max_workers) as fetch_pool:
+                # Future -> (stage, symbol); fetches and screens complete in any order
+                pending = {
+                    fetch_pool.submit(self._fetch_symbol_data, symbol, max_expiry_count): ('fetch', symbol)
+                    for symbol in dict.fromkeys(symbols)
+                }
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage, symbol = pending.pop(future)
+                        try:
+                            result = future.result()
+                            if stage == 'fetch':
+                                if screen_pool is not None:
+                                    pending[screen_pool.submit(_screen_chain, symbol, *result)] = ('screen', symbol)
+                                    continue
+                                result = self._screen_chain(symbol, *result)
+                        except Exception as e:
+                            scan.errors[symbol] = str(e)
+                            continue
+                        
+                        scan.results[symbol] = result
+                        for match in result.strategy_matches:
+                            match = {'symbol': symbol, **match}
+                            ranked = collected.setdefault(match['strategy'], [])
+                            if top_n is None:
+                                ranked.append(match)
+                                continue
+                            entry = (match['static_return'], -arrival, match)
+                            arrival += 1
+                            if len(ranked) < top_n:
+                                heapq.heappush(ranked, entry)
+                            elif entry[:2] > ranked[0][:2]:
+                                heapq.heapreplace(ranked, entry)
+        finally:
+            if screen_pool is not None:
+                screen_pool.shutdown(cancel_futures=True)
+        
+        for strategy in sorted(collected):
+            ranked = collected[strategy]
+            if top_n is None:
+                scan.strategy_matches.extend(sorted(ranked, key=lambda match: -match['static_return']))
+            else:
+                scan.strategy_matches.extend(
+                    match for *_, match in sorted(ranked, key=lambda entry: entry[:2], reverse=True))
+        return scan
+
+    def _fetch_symbol_data(self, symbol: str, max_expiry_count: Optional[int]) -> Tuple[pd.DataFrame, float, Dict]:
+        """Fetch the chain, current price and underlying data for one symbol of a universe scan"""
+        # Symbols are already fetched in parallel, so each one fetches its expirations in turn
+        info, options_chain = self.data_manager.get_quote_and_chains(
+            symbol, max_expiry_count=max_expiry_count, max_workers=1)
+        if options_chain.empty:
+            raise ValueError(f"No options data available for {symbol}")
+        return options_chain, info['regularMarketPrice'], self._underlying_data(info)
+
+    def _screen_chain(self, symbol: str, options_chain: pd.DataFrame, current_price: float,
+                      underlying_data: Dict) -> ScreenerResults:
+        """Run the strategy screens and risk metrics on a fetched chain"""
+        # Screen for different strategies
+        strategies = []
+        
+        # Screen for covered calls
+        covered_calls = self._screen_covered_calls(
+            options_chain, current_price)
+        
+        # Screen for cash-secured puts
+        csps = self._screen_cash_secured_puts(
+            options_chain, current_price)
+        
+        # Result frames become dictionaries only here, for the API response
+        for matches in (covered_calls, csps):
+            strategies.extend(matches.to_dict('records'))
+        
+        # Calculate risk metrics
+        risk_metrics = self._calculate_risk_metrics(
+            options_chain, current_price)
+        
+        return ScreenerResults(
+            symbol=symbol,
+            strategy_matches=strategies,
+            risk_metrics=risk_metrics,
+            underlying_data=underlying_data
+        )
+
+    @staticmethod
+    def _underlying_data(info: Dict) -> Dict:
+        """Underlying data reported with screen results, from ticker info"""
+        return {
+            'price': info['regularMarketPrice'],
+            'volume': info.get('volume'),
+            'market_cap': info.get('marketCap'),
+            'beta': info.get('beta')
+        }
+
     def _screen_covered_calls(self, 
                             chain: pd.DataFrame, 
-                            current_price: float) -> List[Dict]:
-        """Screen for covered call opportunities"""
-        covered_calls = []
+                            current_price: float) -> pd.DataFrame:
+        """
+        Screen for covered call opportunities
         
+        Metrics are computed for all candidate calls at once; returns one row
+        per match with COVERED_CALL_COLUMNS, indexed like the chain.
+        """
         # Filter for calls only
         calls = chain[
             (chain['option_type'] == 'CALL') & 
@@ -82,34 +224,35 @@ class IntegratedOptionsScreener:
             (chain['open_interest'] > 500)  # Minimum open interest
         ]
         
-        for _, option in calls.iterrows():
-            # Calculate metrics
-            premium = (option['bid'] + option['ask']) / 2
-            static_return = (premium / current_price) * 100
-            max_return = ((option['strike_price'] - current_price + premium) / 
-                         current_price) * 100
-            
-            if static_return >= 0.5:  # Minimum 0.5% premium
-                covered_calls.append({
-                    'strategy': 'Covered Call',
-                    'strike': option['strike_price'],
-                    'expiration': option['expiration_date'],
-                    'premium': premium,
-                    'static_return': static_return,
-                    'max_return': max_return,
-                    'implied_volatility': option['implied_volatility'],
-                    'volume': option['volume'],
-                    'open_interest': option['open_interest']
-                })
-        
-        return covered_calls
+        # Calculate metrics
+        premium = (calls['bid'] + calls['ask']) / 2
+        static_return = (premium / current_price) * 100
+        max_return = ((calls['strike_price'] - current_price + premium) / 
+                     current_price) * 100
+        
+        covered_calls = pd.DataFrame({
+            'strategy': 'Covered Call',
+            'strike': calls['strike_price'],
+            'expiration': calls['expiration_date'],
+            'premium': premium,
+            'static_return': static_return,
+            'max_return': max_return,
+            'implied_volatility': calls['implied_volatility'],
+            'volume': calls['volume'],
+            'open_interest': calls['open_interest']
+        }, columns=COVERED_CALL_COLUMNS)
+        
+        return covered_calls[static_return >= 0.5]  # Minimum 0.5% premium
 
     def _screen_cash_secured_puts(self, 
                                 chain: pd.DataFrame, 
-                                current_price: float) -> List[Dict]:
-        """Screen for cash-secured put opportunities"""
-        csps = []
+                                current_price: float) -> pd.DataFrame:
+        """
+        Screen for cash-secured put opportunities
         
+        Metrics are computed for all candidate puts at once; returns one row
+        per match with CASH_SECURED_PUT_COLUMNS, indexed like the chain.
+        """
         # Filter for puts only
         puts = chain[
             (chain['option_type'] == 'PUT') & 
@@ -118,24 +261,22 @@ class IntegratedOptionsScreener:
             (chain['open_interest'] > 500)
         ]
         
-        for _, option in puts.iterrows():
-            premium = (option['bid'] + option['ask']) / 2
-            static_return = (premium / option['strike_price']) * 100
-            
-            if static_return >= 0.3:  # Minimum 0.3% premium
-                csps.append({
-                    'strategy': 'Cash-Secured Put',
-                    'strike': option['strike_price'],
-                    'expiration': option['expiration_date'],
-                    'premium': premium,
-                    'static_return': static_return,
-                    'break_even': option['strike_price'] - premium,
-                    'implied_volatility': option['implied_volatility'],
-                    'volume': option['volume'],
-                    'open_interest': option['open_interest']
-                })
-        
-        return csps
+        premium = (puts['bid'] + puts['ask']) / 2
+        static_return = (premium / puts['strike_price']) * 100
+        
+        csps = pd.DataFrame({
+            'strategy': 'Cash-Secured Put',
+            'strike': puts['strike_price'],
+            'expiration': puts['expiration_date'],
+            'premium': premium,
+            'static_return': static_return,
+            'break_even': puts['strike_price'] - premium,
+            'implied_volatility': puts['implied_volatility'],
+            'volume': puts['volume'],
+            'open_interest': puts['open_interest']
+        }, columns=CASH_SECURED_PUT_COLUMNS)
+        
+        return csps[static_return >= 0.3]  # Minimum 0.3% premium
 
     def _calculate_risk_metrics(self, 
                               chain: pd.DataFrame, 
@@ -190,5 +331,6 @@ class IntegratedOptionsScreener:
         }
 
 # Example usage
-screener = IntegratedOptionsScreener()
-results = screener.screen_for_strategies('AAPL')
+if __name__ == "__main__":
+    screener = IntegratedOptionsScreener()
+    results = screener.screen_for_strategies('AAPL')
@@ -1,7 +1,19 @@
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 
+# Bounds apply_all_filters inherits from the individual filters' defaults
+# (gamma >= 0, theta <= 0 and an IV/HV ratio between 0.8 and 1.2)
+IMPLICIT_BOUNDS = {
+    'gamma': (0, float('inf')),
+    'theta': (float('-inf'), 0),
+    'iv_hv_ratio': (0.8, 1.2),
+}
+
+# Rows sampled to estimate predicate selectivity before a plan has run
+SELECTIVITY_SAMPLE_SIZE = 1024
+
 @dataclass
 class FilterParameters:
     min_volume: int = 0
@@ -16,6 +28,116 @@ class FilterParameters:
     max_dte: int = float('inf')
     max_spread_percent: float = float('inf')
 
+class FilterPlan:
+    def __init__(self, params: FilterParameters):
+        """
+        Single-pass predicate compiled from FilterParameters
+        
+        Selects the same rows as chaining the individual filters, including
+        their implicit bounds and the exclusion of rows with NaN in any
+        filtered value, but without intermediate frames. Infinite bounds are
+        dropped (leaving only the NaN check), derived values (strike ratio,
+        IV/HV ratio, spread, DTE) are computed once and only for rows still in
+        play, and predicates run most selective first, ordered by the pass
+        rates observed on earlier frames (or a sample of the first one).
+        
+        Parameters:
+        - params: Filter thresholds
+        """
+        bounds = {
+            'volume': (params.min_volume, float('inf')),
+            'open_interest': (params.min_open_interest, float('inf')),
+            'strike_ratio': (params.min_strike_ratio, params.max_strike_ratio),
+            'delta': (params.min_delta, params.max_delta),
+            'gamma': IMPLICIT_BOUNDS['gamma'],
+            'theta': IMPLICIT_BOUNDS['theta'],
+            'implied_volatility': (params.min_iv, params.max_iv),
+            'iv_hv_ratio': IMPLICIT_BOUNDS['iv_hv_ratio'],
+            'spread_percent': (float('-inf'), params.max_spread_percent),
+            'dte': (params.min_dte, params.max_dte),
+        }
+        # (value, lower, upper) with None for bounds that only exclude NaN
+        self.predicates: List[Tuple[str, Optional[float], Optional[float]]] = [
+            (value,
+             None if lower == float('-inf') else lower,
+             None if upper == float('inf') else upper)
+            for value, (lower, upper) in bounds.items()
+        ]
+        self.pass_rates: Dict[str, float] = {}
+
+    def indices(self, options_df) -> np.ndarray:
+        """Positions of the rows that pass every predicate, in frame order"""
+        values = _FilterValues(options_df)
+        if not self.pass_rates and len(options_df) > SELECTIVITY_SAMPLE_SIZE:
+            sample = np.linspace(0, len(options_df) - 1, SELECTIVITY_SAMPLE_SIZE).astype(np.int64)
+            for predicate in self.predicates:
+                self.pass_rates[predicate[0]] = self._evaluate(predicate, values, sample).mean()
+        
+        rows = None  # All rows until the first predicate has run
+        for predicate in sorted(self.predicates, key=lambda p: self.pass_rates.get(p[0], 1.0)):
+            passed = self._evaluate(predicate, values, rows)
+            if len(passed):
+                self.pass_rates[predicate[0]] = passed.mean()
+            rows = np.flatnonzero(passed) if rows is None else rows[passed]
+            if not len(rows):
+                break
+        
+        return np.arange(len(options_df)) if rows is None else rows
+
+    def mask(self, options_df) -> np.ndarray:
+        """Boolean mask of the rows that pass every predicate"""
+        mask = np.zeros(len(options_df), dtype=bool)
+        mask[self.indices(options_df)] = True
+        return mask
+
+    def apply(self, options_df):
+        """Filtered copy of the frame"""
+        return options_df.iloc[self.indices(options_df)]
+
+    @staticmethod
+    def _evaluate(predicate, values, rows) -> np.ndarray:
+        name, lower, upper = predicate
+        value = values.get(name, rows)
+        if lower is None and upper is None:
+            return ~np.isnan(value)
+        if lower is None:
+            return value <= upper
+        if upper is None:
+            return value >= lower
+        return (value >= lower) & (value <= upper)
+
+class _FilterValues:
+    """Raw and derived filter values of a frame, gathered for a subset of rows on request"""
+    def __init__(self, options_df):
+        self.options_df = options_df
+        self.columns: Dict[str, np.ndarray] = {}
+        self.now = datetime.now()
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self.columns:
+            if name == 'expiration_date':
+                self.columns[name] = self.options_df[name].to_numpy(dtype='datetime64[ns]')
+            else:
+                self.columns[name] = self.options_df[name].to_numpy(dtype=float, na_value=np.nan)
+        return self.columns[name]
+
+    def get(self, name: str, rows: Optional[np.ndarray]) -> np.ndarray:
+        def take(column):
+            values = self.column(column)
+            return values if rows is None else values[rows]
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if name == 'strike_ratio':
+                return take('strike_price') / take('underlying_price')
+            if name == 'iv_hv_ratio':
+                return take('implied_volatility') / take('historical_volatility_30d')
+            if name == 'spread_percent':
+                return (take('ask') - take('bid')) / take('underlying_price')
+            if name == 'dte':
+                # Whole days, floored like Timedelta.days (NaT becomes NaN)
+                return np.floor((take('expiration_date') - np.datetime64(self.now, 'ns')) / np.timedelta64(1, 'D'))
+            return take(name)
+
 class OptionsFilters:
     @staticmethod
     def filter_by_liquidity(options_df, min_volume=100, min_open_interest=500):
@@ -68,27 +190,12 @@ class OptionsFilters:
         mask = (dte >= min_dte) & (dte <= max_dte)
         return options_df[mask]
 
+    @staticmethod
+    def compile_filters(params: FilterParameters) -> FilterPlan:
+        """Compile filter parameters into a reusable single-pass FilterPlan"""
+        return FilterPlan(params)
+
     @staticmethod
     def apply_all_filters(options_df, params: FilterParameters):
         """Apply all filters with given parameters"""
-        filtered_df = options_df.copy()
-        
-        filtered_df = OptionsFilters.filter_by_liquidity(
-            filtered_df, params.min_volume, params.min_open_interest)
-        
-        filtered_df = OptionsFilters.filter_by_moneyness(
-            filtered_df, params.min_strike_ratio, params.max_strike_ratio)
-        
-        filtered_df = OptionsFilters.filter_by_greeks(
-            filtered_df, params.min_delta, params.max_delta)
-        
-        filtered_df = OptionsFilters.filter_by_volatility(
-            filtered_df, params.min_iv, params.max_iv)
-        
-        filtered_df = OptionsFilters.filter_by_spread(
-            filtered_df, params.max_spread_percent)
-        
-        filtered_df = OptionsFilters.filter_by_expiration(
-            filtered_df, params.min_dte, params.max_dte)
-        
-        return filtered_df
+        return FilterPlan(params).apply(options_df)
@@ -1,7 +1,21 @@
 import numpy as np
 from scipy.stats import norm
+from scipy.special import ndtr
 from dataclasses import dataclass
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+import os
+import sys
+
+# The shared simple_*.py modules live in the repository root; make them importable
+# when this script is run from its own directory
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.append(REPO_DIR)
+
+from simple_greeks import black_scholes_greeks
+
+# Leg kinds used by the generic strategy engine
+LEG_KINDS = {'stock': 0, 'call': 1, 'put': 2}
 
 @dataclass
 class RiskMetrics:
@@ -27,7 +41,207 @@ class OptionsRiskCalculator:
         elif strategy == "iron_condor":
             return self._iron_condor_metrics(positions, underlying_price, 
                                           days_to_expiration, volatility)
-        # Add other strategies...
+        # Any other strategy: positions are explicit legs for the generic engine
+        return self.calculate_strategy_metrics(positions, underlying_price,
+                                               days_to_expiration, volatility)
+
+    def score_candidates_batch(self, underlying_price, lower_break_even, upper_break_even,
+                               max_profit, max_loss, days_to_expiration, volatility,
+                               profit_inside=True) -> Dict[str, np.ndarray]:
+        """
+        Score many candidate trades at once from their break-evens and payoff bounds
+        
+        The profit zone is the price range between the break-evens at
+        expiration (or outside it when profit_inside is False, e.g. long
+        straddles). Use 0 / NaN for a missing lower break-even and inf / NaN
+        for a missing upper one. Probability of profit integrates the lognormal
+        terminal price (drift r - sigma^2/2) over the profit zone; expected
+        value uses the same two-outcome approximation as the per-strategy
+        metrics (max profit with POP, max loss otherwise).
+        
+        Parameters:
+        - underlying_price: Current price(s) of the underlying
+        - lower_break_even, upper_break_even: Break-even arrays
+        - max_profit, max_loss: Payoff bounds (max_loss as a positive amount)
+        - days_to_expiration, volatility: Per-candidate DTE and IV
+        - profit_inside: Boolean array (or scalar) selecting the profit zone
+        
+        Returns a dictionary of arrays: probability_of_profit, expected_value
+        and risk_reward_ratio.
+        """
+        S, lower, upper, max_profit, max_loss, days, sigma, profit_inside = np.broadcast_arrays(
+            *(np.asarray(x, dtype=float) for x in (
+                underlying_price, lower_break_even, upper_break_even,
+                max_profit, max_loss, days_to_expiration, volatility)),
+            np.asarray(profit_inside, dtype=bool)
+        )
+        lower = np.where(np.isnan(lower), 0.0, lower)
+        upper = np.where(np.isnan(upper), np.inf, upper)
+        
+        T = np.maximum(days, 0) / 365.0
+        # ln(S_T / S) ~ N((r - sigma^2/2) T, sigma^2 T); a zero spread puts all mass at the forward
+        spread = np.maximum(sigma * np.sqrt(T), 1e-12)
+        drift = (self.risk_free_rate - 0.5 * sigma**2) * T
+        with np.errstate(divide='ignore'):
+            z_lower = (np.log(np.maximum(lower, 0) / S) - drift) / spread
+            z_upper = (np.log(upper / S) - drift) / spread
+        prob_inside = np.clip(ndtr(z_upper) - ndtr(z_lower), 0.0, 1.0)
+        prob_profit = np.where(profit_inside, prob_inside, 1.0 - prob_inside)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            risk_reward = np.where(max_loss != 0, np.abs(max_profit / max_loss), np.inf)
+        
+        return {
+            'probability_of_profit': prob_profit,
+            'expected_value': max_profit * prob_profit - max_loss * (1 - prob_profit),
+            'risk_reward_ratio': risk_reward
+        }
+
+    def calculate_strategy_metrics(self, legs: list, underlying_price: float,
+                                   days_to_expiration: int, volatility: float) -> RiskMetrics:
+        """Calculate risk metrics for an arbitrary multi-leg strategy (see calculate_strategy_metrics_batch)"""
+        return self.calculate_strategy_metrics_batch(
+            [legs], underlying_price, days_to_expiration, volatility
+        )[0]
+
+    def calculate_strategy_metrics_batch(self, strategies: List[list], underlying_price,
+                                         days_to_expiration, volatility,
+                                         grid_points: int = 32) -> List[RiskMetrics]:
+        """
+        Calculate risk metrics for many multi-leg strategies in one vectorized pass
+        
+        Each strategy is a list of legs:
+        - type: 'call', 'put' or 'stock'
+        - strike: Strike price (options only)
+        - premium: Price per share paid (long) or received (short); for stock
+          the entry price, defaulting to underlying_price
+        - quantity: Signed number of units, negative for short (default 1)
+        - implied_volatility: Optional per-leg volatility for the Greeks
+        
+        The expiry P&L is evaluated on a price grid that contains every strike,
+        so the piecewise-linear payoff is exact between grid points: max profit
+        and loss come from the grid plus the slope beyond it, break-evens from
+        sign changes (interpolated, or extrapolated past the last point), and
+        probability of profit and expected value from integrating the
+        profitable segments against the lognormal density (drift r - sigma^2/2).
+        
+        Parameters:
+        - strategies: List of leg lists; a strategy without legs raises ValueError
+        - underlying_price, days_to_expiration, volatility: Scalars, or one
+          value per strategy
+        - grid_points: Evenly spaced points added to the strikes (the payoff is
+          linear between strikes, so a coarse grid loses no accuracy)
+        """
+        n = len(strategies)
+        empty = [i for i, legs in enumerate(strategies) if not legs]
+        if empty:
+            raise ValueError(f"Strategies without legs: {empty}")
+        S0 = np.broadcast_to(np.asarray(underlying_price, dtype=float), (n,))
+        T = np.broadcast_to(np.asarray(days_to_expiration, dtype=float), (n,)) / 365.0
+        sigma = np.broadcast_to(np.asarray(volatility, dtype=float), (n,))
+        
+        # Legs padded to (strategy x leg) arrays; padding legs have zero quantity
+        n_legs = max((len(legs) for legs in strategies), default=0)
+        kind = np.zeros((n, n_legs), dtype=np.int64)
+        strike = np.zeros((n, n_legs))
+        premium = np.zeros((n, n_legs))
+        quantity = np.zeros((n, n_legs))
+        leg_sigma = np.ones((n, n_legs))
+        for i, legs in enumerate(strategies):
+            for j, leg in enumerate(legs):
+                kind[i, j] = LEG_KINDS[leg['type'].lower()]
+                strike[i, j] = leg.get('strike', 0.0)
+                premium[i, j] = leg.get('premium', S0[i] if kind[i, j] == 0 else 0.0)
+                quantity[i, j] = leg.get('quantity', 1)
+                leg_sigma[i, j] = leg.get('implied_volatility', sigma[i])
+        is_stock = kind == 0
+        is_call = kind == 1
+        is_put = kind == 2
+        
+        # Price grid: 0 to well past the strikes and the lognormal bulk, plus every strike
+        log_sd = sigma * np.sqrt(T)
+        upper = np.maximum(
+            S0 * np.exp(self.risk_free_rate * T + 8 * log_sd),
+            np.where(is_stock, 0.0, strike).max(axis=1, initial=0.0) * 1.25
+        )
+        upper = np.maximum(upper, S0 * 1.25)
+        base_grid = np.linspace(0.0, 1.0, grid_points)[None, :] * upper[:, None]
+        grid = np.sort(np.concatenate([base_grid, np.where(is_stock, 0.0, strike)], axis=1), axis=1)
+        
+        pnl = self._expiry_pnl(
+            grid[:, :, None], kind[:, None], strike[:, None], premium[:, None], quantity[:, None]
+        ).sum(axis=2)
+        # Beyond the last strike only calls and stock still move with the price
+        tail_slope = (quantity * (is_call | is_stock)).sum(axis=1)
+        
+        max_profit = np.where(tail_slope > 0, np.inf, pnl.max(axis=1))
+        max_loss = np.where(tail_slope < 0, np.inf, -pnl.min(axis=1))
+        
+        # Segments between grid points, plus the open segment past the last point
+        a = grid
+        b = np.concatenate([grid[:, 1:], np.full((n, 1), np.inf)], axis=1)
+        p_a = pnl
+        profit_a = pnl > 0
+        profit_b = np.concatenate(
+            [pnl[:, 1:] > 0, ((tail_slope > 0) | ((tail_slope == 0) & (pnl[:, -1] > 0)))[:, None]],
+            axis=1
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = np.concatenate([np.diff(pnl, axis=1) / np.diff(grid, axis=1), tail_slope[:, None]], axis=1)
+            root = a - p_a / slope
+        slope = np.where(np.isfinite(slope), slope, 0.0)
+        flip = profit_a != profit_b
+        
+        # Profitable part [lo, hi] of each segment
+        lo = np.where(flip & ~profit_a, root, a)
+        hi = np.where(flip & profit_a, root, b)
+        profitable = profit_a | profit_b
+        
+        # Lognormal terminal price: ln S ~ N(m, s^2); cdf and partial mean E[S; S < x] at segment ends
+        m = (np.log(S0) + (self.risk_free_rate - 0.5 * sigma**2) * T)[:, None]
+        s = np.maximum(log_sd, 1e-12)[:, None]  # expiring today: all mass at the current price
+        forward = np.exp(m + 0.5 * s**2)
+        with np.errstate(divide='ignore'):
+            z = {name: (np.log(x) - m) / s for name, x in (('a', a), ('b', b), ('lo', lo), ('hi', hi))}
+        
+        prob_profit = np.where(profitable, ndtr(z['hi']) - ndtr(z['lo']), 0.0).sum(axis=1)
+        # E[P&L] segment by segment, with P(x) = p_a + slope * (x - a) on [a, b]
+        mass = ndtr(z['b']) - ndtr(z['a'])
+        partial_mean = forward * (ndtr(z['b'] - s) - ndtr(z['a'] - s))
+        expected_value = ((p_a - slope * a) * mass + slope * partial_mean).sum(axis=1)
+        
+        # Position Greeks at the current price (per day theta, per 1% vega)
+        greeks = black_scholes_greeks(S0[:, None], strike, T[:, None], leg_sigma, is_call, r=self.risk_free_rate)
+        is_option = is_call | is_put
+        theta_per_day = (quantity * np.where(is_option, greeks['theta'], 0.0)).sum(axis=1)
+        vega_exposure = (quantity * np.where(is_option, greeks['vega'], 0.0)).sum(axis=1)
+        
+        results = []
+        for i in range(n):
+            break_evens = root[i][flip[i]]
+            risk_reward = abs(max_profit[i] / max_loss[i]) if max_loss[i] != 0 else np.inf
+            results.append(RiskMetrics(
+                probability_of_profit=float(prob_profit[i]),
+                max_profit=float(max_profit[i]),
+                max_loss=float(max_loss[i]),
+                break_even_points=[float(x) for x in break_evens],
+                risk_reward_ratio=float(risk_reward),
+                expected_value=float(expected_value[i]),
+                theta_per_day=float(theta_per_day[i]),
+                vega_exposure=float(vega_exposure[i])
+            ))
+        return results
+
+    @staticmethod
+    def _expiry_pnl(prices: np.ndarray, kind: np.ndarray, strike: np.ndarray,
+                    premium: np.ndarray, quantity: np.ndarray) -> np.ndarray:
+        """Per-leg P&L at expiration for each price (broadcast over legs)"""
+        payoff = np.where(
+            kind == 0,
+            prices,
+            np.where(kind == 1, np.maximum(prices - strike, 0), np.maximum(strike - prices, 0))
+        )
+        return quantity * (payoff - premium)
 
     def _covered_call_metrics(self, option, underlying_price: float, 
                             days_to_expiration: int, volatility: float) -> RiskMetrics:
@@ -134,10 +348,10 @@ class OptionsRiskCalculator:
         
         theta = -(S * norm.pdf(d1) * sigma) / (2 * np.sqrt(T)) - \
                 self.risk_free_rate * K * np.exp(-self.risk_free_rate * T) * norm.cdf(d2)
-                
+        
         if option_type.lower() == 'put':
             theta = theta + self.risk_free_rate * K * np.exp(-self.risk_free_rate * T)
-            
+        
         return theta
 
     def _calculate_vega(self, S: float, K: float, T: int, sigma: float) -> float:
@@ -1,8 +1,16 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+# Numeric fields OptionsIndex keeps sorted for range queries
+INDEXED_FIELDS = ('strike_ratio', 'dte', 'delta', 'implied_vol')
+
 # Core Data Structures
 class OptionContract:
     def __init__(self):
         self.symbol = str          # Underlying symbol
         self.strike = float        # Strike price
+        self.underlying_price = float  # Underlying price when quoted
         self.expiration = datetime # Expiration date
         self.option_type = str     # 'call' or 'put'
         self.bid = float          # Current bid price
@@ -15,15 +23,134 @@ class OptionContract:
         self.theta = float        # Theta
         self.vega = float         # Vega
 
+class OptionsIndex:
+    def __init__(self, contracts: Iterable[OptionContract], as_of: Optional[datetime] = None):
+        """
+        Sorted multi-key index over a list of OptionContract objects
+        
+        Each indexed field (strike/underlying ratio, DTE, delta, IV) is kept
+        as a value array plus the row order that sorts it, so a range is two
+        binary searches. Rows are also partitioned by symbol. A query takes
+        the narrowest candidate set (one range or the symbol partitions) and
+        checks the other constraints on those rows only, so its cost follows
+        the number of candidates rather than the size of the universe.
+        
+        Parameters:
+        - contracts: Contracts to index (the index is static; rebuild after loading new data)
+        - as_of: Reference time for days to expiration (defaults to now)
+        """
+        self.contracts = list(contracts)
+        self.as_of = as_of or datetime.now()
+        
+        n = len(self.contracts)
+        strike = np.fromiter((c.strike for c in self.contracts), dtype=float, count=n)
+        underlying = np.fromiter((c.underlying_price for c in self.contracts), dtype=float, count=n)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            strike_ratio = strike / underlying
+        self.values: Dict[str, np.ndarray] = {
+            'strike_ratio': strike_ratio,
+            'dte': np.fromiter(((c.expiration - self.as_of).days for c in self.contracts), dtype=float, count=n),
+            'delta': np.fromiter((c.delta for c in self.contracts), dtype=float, count=n),
+            'implied_vol': np.fromiter((c.implied_vol for c in self.contracts), dtype=float, count=n),
+        }
+        # NaN sorts last, so it never falls inside a finite or infinite range
+        self.order = {name: np.argsort(values, kind='stable') for name, values in self.values.items()}
+        self.sorted_values = {name: self.values[name][order] for name, order in self.order.items()}
+        
+        symbols, self.symbol_codes = np.unique([c.symbol for c in self.contracts], return_inverse=True)
+        self.symbol_ids = {symbol: code for code, symbol in enumerate(symbols)}
+        by_symbol = np.argsort(self.symbol_codes, kind='stable')
+        bounds = np.searchsorted(self.symbol_codes[by_symbol], np.arange(len(symbols) + 1))
+        self.partitions: Dict[str, np.ndarray] = {
+            symbol: by_symbol[bounds[code]:bounds[code + 1]] for code, symbol in enumerate(symbols)
+        }
+
+    def __len__(self):
+        return len(self.contracts)
+
+    def range_rows(self, field: str, low: float = float('-inf'), high: float = float('inf')) -> np.ndarray:
+        """Rows (unsorted) with low <= field <= high, found by binary search"""
+        start, stop = self._range_bounds(field, low, high)
+        return self.order[field][start:stop]
+
+    def query(self, symbols: Optional[Iterable[str]] = None,
+              **ranges: Tuple[float, float]) -> np.ndarray:
+        """
+        Rows matching every constraint, in contract order
+        
+        Parameters:
+        - symbols: Restrict to these underlyings (a symbol or an iterable of symbols; None for all)
+        - ranges: Inclusive (low, high) bounds keyed by INDEXED_FIELDS name,
+          e.g. strike_ratio=(0.9, 1.1), dte=(7, 45)
+        """
+        unknown = set(ranges) - set(INDEXED_FIELDS)
+        if unknown:
+            raise ValueError(f"Unindexed fields: {sorted(unknown)}")
+        if symbols is not None:
+            # Read once: a generator would be empty on the second pass, a str iterates by character;
+            # repeats are dropped so each partition is concatenated at most once
+            symbols = [symbols] if isinstance(symbols, str) else list(dict.fromkeys(symbols))
+        
+        # Candidate set sizes cost two binary searches each; start from the smallest
+        spans = {field: self._range_bounds(field, *bounds) for field, bounds in ranges.items()}
+        candidates = None
+        if symbols is not None:
+            partitions = [self.partitions[s] for s in symbols if s in self.partitions]
+            candidate_count = sum(len(rows) for rows in partitions)
+        if spans:
+            narrowest = min(spans, key=lambda field: spans[field][1] - spans[field][0])
+            start, stop = spans[narrowest]
+            if symbols is None or stop - start <= candidate_count:
+                candidates = self.order[narrowest][start:stop]
+                del spans[narrowest]
+        if candidates is None:
+            candidates = (np.concatenate(partitions) if partitions else np.empty(0, dtype=np.int64)) \
+                if symbols is not None else np.arange(len(self))
+            symbols = None
+        
+        # Intersect with the remaining constraints (most selective first) by checking the candidates' values
+        for field in sorted(spans, key=lambda field: spans[field][1] - spans[field][0]):
+            low, high = ranges[field]
+            values = self.values[field][candidates]
+            candidates = candidates[(values >= low) & (values <= high)]
+        if symbols is not None:
+            codes = [self.symbol_ids[s] for s in symbols if s in self.symbol_ids]
+            candidates = candidates[np.isin(self.symbol_codes[candidates], codes)]
+        
+        return np.sort(candidates)
+
+    def select(self, symbols: Optional[Iterable[str]] = None,
+               **ranges: Tuple[float, float]) -> List[OptionContract]:
+        """Contracts matching every constraint (see query)"""
+        return [self.contracts[row] for row in self.query(symbols, **ranges)]
+
+    def _range_bounds(self, field: str, low: float, high: float) -> Tuple[int, int]:
+        sorted_values = self.sorted_values[field]
+        start = np.searchsorted(sorted_values, low, side='left')
+        stop = np.searchsorted(sorted_values, high, side='right')
+        return int(start), int(max(stop, start))
+
 class OptionsScreener:
     def __init__(self):
         self.options_database = []  # List of OptionContract objects
         self.active_filters = {}    # Dictionary of active filters
+        self.index = None           # OptionsIndex over options_database
         
     def load_options_data(self, source):
         """Load options data from external source (API/database)"""
         pass
         
+    def build_index(self, as_of: Optional[datetime] = None) -> OptionsIndex:
+        """(Re)build the range-query index after options_database changes"""
+        self.index = OptionsIndex(self.options_database, as_of)
+        return self.index
+        
+    def query_options(self, symbols=None, **ranges) -> List[OptionContract]:
+        """Range query over the indexed database (see OptionsIndex.query)"""
+        if self.index is None:
+            self.build_index()
+        return self.index.select(symbols, **ranges)
+        
     def apply_filters(self, filters):
         """Apply multiple filters to the options database"""
         filtered_options = self.options_database
@@ -1,6 +1,19 @@
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
+import heapq
+import numpy as np
+import pandas as pd
+
+# Put spreads joined per vectorized block in find_iron_condors (bounds the block x call spread matrices)
+JOIN_BLOCK_ROWS = 64
+
+# Columns of the find_iron_condors result frame (prices and losses per share)
+IRON_CONDOR_COLUMNS = [
+    'expiration_date', 'long_put_strike', 'short_put_strike', 'short_call_strike',
+    'long_call_strike', 'credit', 'max_loss', 'probability_of_profit',
+    'risk_reward_ratio', 'score'
+]
 
 @dataclass
 class StrategyTemplate:
@@ -168,6 +181,157 @@ class OptionsStrategyScreener:
             
         return filtered_chain
 
+    def find_iron_condors(self, options_chain: pd.DataFrame, underlying_price: Optional[float] = None,
+                          top_k: int = 10, max_wing_width: Optional[float] = None) -> pd.DataFrame:
+        """
+        Search a chain for the best iron condors of the iron_condor template
+        
+        Put and call credit spreads are generated separately: short strikes
+        inside the wing delta band, long strikes found by binary search in the
+        sorted strikes between min_wing_width and max_wing_width away. Spreads
+        that collect no credit, or that cannot reach min_credit even with the
+        richest spread on the other side, are pruned. The two sides are then
+        joined per expiration (richest put spreads first, each against only
+        the call spreads that can still reach min_credit) into a bounded
+        top-k heap, instead of enumerating all four-leg combinations.
+        
+        Score is probability of profit times credit per dollar of max loss,
+        with probability of profit approximated as 1 - |short put delta| -
+        short call delta. Legs are priced at the bid/ask mid.
+        
+        Parameters:
+        - options_chain: Chain with strike_price, option_type, bid, ask, delta and
+          optionally expiration_date, days_to_expiration and underlying_price
+        - underlying_price: Underlying price (defaults to the chain's underlying_price)
+        - top_k: Number of condors to return
+        - max_wing_width: Maximum wing width as a fraction of the underlying price
+          (None for no limit)
+        
+        Returns the top_k condors with IRON_CONDOR_COLUMNS, best score first.
+        """
+        filters = self.templates["iron_condor"].filters
+        if underlying_price is None:
+            underlying_price = float(options_chain['underlying_price'].iloc[0])
+        
+        chain = options_chain
+        if 'days_to_expiration' in chain.columns:
+            chain = chain[chain['days_to_expiration'].between(filters["min_dte"], filters["max_dte"])]
+        
+        min_width = filters["min_wing_width"] * underlying_price
+        max_width = np.inf if max_wing_width is None else max_wing_width * underlying_price
+        
+        # Min-heap of (score, sequence, condor) holding the best top_k so far
+        heap = []
+        if 'expiration_date' in chain.columns:
+            expiries = chain.groupby('expiration_date', sort=False)
+        else:
+            expiries = [(None, chain)]
+        for expiration_date, expiry_chain in expiries:
+            option_type = expiry_chain['option_type'].str.upper()
+            put_spreads = self._credit_spreads(
+                expiry_chain[option_type == 'PUT'], underlying_price, filters, min_width, max_width, is_put=True)
+            call_spreads = self._credit_spreads(
+                expiry_chain[option_type == 'CALL'], underlying_price, filters, min_width, max_width, is_put=False)
+            self._join_condors(put_spreads, call_spreads, filters["min_credit"], expiration_date, top_k, heap)
+        
+        best = sorted(heap, reverse=True)
+        return pd.DataFrame([condor for _, _, condor in best], columns=IRON_CONDOR_COLUMNS)
+
+    @staticmethod
+    def _credit_spreads(legs: pd.DataFrame, underlying_price: float, filters: Dict,
+                        min_width: float, max_width: float, is_put: bool) -> Dict[str, np.ndarray]:
+        """Vertical credit spreads on one side of an iron condor, richest credit first"""
+        bid = legs['bid'].to_numpy(dtype=float)
+        ask = legs['ask'].to_numpy(dtype=float)
+        delta = np.abs(legs['delta'].to_numpy(dtype=float))
+        quoted = (bid >= 0) & (ask > 0) & ((ask - bid) / underlying_price <= filters["max_bid_ask_spread"])
+        
+        order = np.argsort(legs['strike_price'].to_numpy(dtype=float)[quoted], kind='stable')
+        strikes = legs['strike_price'].to_numpy(dtype=float)[quoted][order]
+        mids = ((bid + ask) / 2)[quoted][order]
+        delta = delta[quoted][order]
+        
+        low_delta, high_delta = filters["put_wing_delta" if is_put else "call_wing_delta"]
+        shorts = np.flatnonzero((delta >= low_delta) & (delta <= high_delta))
+        # Long legs sit further out of the money: below the short put, above the short call
+        if is_put:
+            first = np.searchsorted(strikes, strikes[shorts] - max_width, side='left')
+            last = np.searchsorted(strikes, strikes[shorts] - min_width, side='right')
+        else:
+            first = np.searchsorted(strikes, strikes[shorts] + min_width, side='left')
+            last = np.searchsorted(strikes, strikes[shorts] + max_width, side='right')
+        
+        counts = np.maximum(last - first, 0)
+        short_rows = np.repeat(shorts, counts)
+        long_rows = np.concatenate([np.arange(a, b) for a, b in zip(first, last) if b > a] or [np.empty(0, dtype=np.int64)])
+        credit = mids[short_rows] - mids[long_rows]
+        keep = credit > 0
+        short_rows, long_rows, credit = short_rows[keep], long_rows[keep], credit[keep]
+        
+        richest = np.argsort(-credit, kind='stable')
+        short_rows, long_rows, credit = short_rows[richest], long_rows[richest], credit[richest]
+        return {
+            'short_strike': strikes[short_rows],
+            'long_strike': strikes[long_rows],
+            'short_delta': delta[short_rows],
+            'width': np.abs(strikes[short_rows] - strikes[long_rows]),
+            'credit': credit
+        }
+
+    @staticmethod
+    def _join_condors(put_spreads: Dict[str, np.ndarray], call_spreads: Dict[str, np.ndarray],
+                      min_credit: float, expiration_date, top_k: int, heap: List):
+        """
+        Join put and call spreads into condors, keeping the best top_k in heap
+        
+        Put spreads are joined JOIN_BLOCK_ROWS at a time against the call
+        spreads that the block's richest put spread can still pair with, so
+        the Python overhead is per block rather than per put spread.
+        """
+        call_credit = call_spreads['credit']
+        if not len(call_credit):
+            return
+        negated_call_credit = -call_credit
+        put_credit = put_spreads['credit']
+        # Put spreads are richest first, so once even the richest call spread falls short, all do
+        n_puts = np.searchsorted(-put_credit, call_credit[0] - min_credit, side='right')
+        
+        for start in range(0, n_puts, JOIN_BLOCK_ROWS):
+            rows = slice(start, min(start + JOIN_BLOCK_ROWS, n_puts))
+            # Call spreads (richest first) that the block's richest put spread can bring to min_credit
+            n_calls = np.searchsorted(negated_call_credit, put_credit[start] - min_credit, side='right')
+            
+            credit = put_credit[rows, None] + call_credit[None, :n_calls]
+            max_loss = np.maximum(put_spreads['width'][rows, None], call_spreads['width'][None, :n_calls]) - credit
+            probability = 1 - put_spreads['short_delta'][rows, None] - call_spreads['short_delta'][None, :n_calls]
+            valid = (
+                (credit >= min_credit) & (max_loss > 0)
+                & (put_spreads['short_strike'][rows, None] < call_spreads['short_strike'][None, :n_calls])
+            )
+            score = np.where(valid, probability * credit / np.where(valid, max_loss, 1.0), -np.inf)
+            
+            threshold = heap[0][0] if len(heap) == top_k else -np.inf
+            candidates = np.flatnonzero(valid & (score > threshold))
+            if len(candidates) > top_k:
+                candidates = np.sort(candidates[np.argpartition(-score.ravel()[candidates], top_k - 1)[:top_k]])
+            
+            for block_row, j in zip(*np.unravel_index(candidates, score.shape)):
+                if len(heap) == top_k and score[block_row, j] <= heap[0][0]:
+                    continue
+                i = start + block_row
+                condor = (
+                    expiration_date,
+                    put_spreads['long_strike'][i], put_spreads['short_strike'][i],
+                    call_spreads['short_strike'][j], call_spreads['long_strike'][j],
+                    credit[block_row, j], max_loss[block_row, j], probability[block_row, j],
+                    max_loss[block_row, j] / credit[block_row, j], score[block_row, j]
+                )
+                entry = (score[block_row, j], (i, j), condor)
+                if len(heap) < top_k:
+                    heapq.heappush(heap, entry)
+                else:
+                    heapq.heapreplace(heap, entry)
+
     def _calculate_risk_metric(self, metric_name: str, data: pd.DataFrame) -> pd.Series:
         """Calculate specific risk metrics for a strategy"""
         # Implementation of various risk metric calculations
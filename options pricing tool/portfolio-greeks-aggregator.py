@@ -0,0 +1,187 @@
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import os
+import sys
+
+# The shared simple_*.py modules live in the repository root; make them importable
+# when this script is run from its own directory
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.append(REPO_DIR)
+
+from simple_greeks import black_scholes_greeks
+
+GREEKS = ('delta', 'gamma', 'vega', 'theta')
+
+# Upper bounds (days to expiration, inclusive) of the expiry buckets; anything longer goes in the last bucket
+DEFAULT_EXPIRY_BUCKETS = (7, 30, 90, 180, 365)
+
+@dataclass
+class UnderlyingBook:
+    """Array-backed positions on one underlying, with the Greeks at the last spot"""
+    ids: np.ndarray
+    is_call: np.ndarray
+    strike: np.ndarray
+    quantity: np.ndarray
+    years_to_expiration: np.ndarray
+    volatility: np.ndarray
+    bucket: np.ndarray
+    spot: Optional[float] = None
+    # Per-position Greeks (quantity and multiplier applied) at spot
+    position_greeks: Dict[str, np.ndarray] = field(default_factory=dict)
+    totals: Dict[str, float] = field(default_factory=dict)
+    bucket_totals: Dict[str, np.ndarray] = field(default_factory=dict)
+
+class PortfolioGreeksAggregator:
+    def __init__(self, risk_free_rate: float = 0.05, contract_multiplier: float = 1.0,
+                 expiry_buckets: Tuple[int, ...] = DEFAULT_EXPIRY_BUCKETS,
+                 default_volatility: float = 0.3):
+        """
+        Running delta/gamma/vega/theta totals for a large options book
+        
+        Positions are stored as arrays grouped by underlying. A spot update
+        reprices only that underlying's group (cost proportional to its
+        position count) and refreshes its per-underlying and per-expiry-bucket
+        totals; the rest of the book is never touched. Portfolio totals are
+        summed from the per-underlying totals on request.
+        
+        Parameters:
+        - risk_free_rate: Risk-free rate for Black-Scholes
+        - contract_multiplier: Shares per contract applied to every Greek
+        - expiry_buckets: Inclusive upper bounds (days) of the expiry buckets
+        - default_volatility: Volatility for positions without 'implied_volatility'
+        """
+        self.risk_free_rate = risk_free_rate
+        self.contract_multiplier = contract_multiplier
+        self.expiry_buckets = tuple(expiry_buckets)
+        self.default_volatility = default_volatility
+        self.bucket_labels = self._bucket_labels(self.expiry_buckets)
+        self.books: Dict[str, UnderlyingBook] = {}
+        self._next_id = 0
+
+    def add_positions(self, positions: List[Dict]) -> List[int]:
+        """
+        Add option positions to the book
+        
+        Parameters:
+        - positions: Dicts with 'underlying', 'type' ('call'/'put'), 'strike',
+          'quantity' (negative for short), 'days_to_expiration' and optionally
+          'implied_volatility' and 'id'
+        
+        Returns the position ids. Groups that already have a spot are repriced.
+        """
+        ids = []
+        by_underlying: Dict[str, List[Dict]] = {}
+        for position in positions:
+            position_id = position.get('id')
+            if position_id is None:
+                position_id = self._next_id
+                self._next_id += 1
+            ids.append(position_id)
+            by_underlying.setdefault(position['underlying'].upper(), []).append({**position, 'id': position_id})
+        
+        for underlying, group in by_underlying.items():
+            days = np.array([pos['days_to_expiration'] for pos in group], dtype=float)
+            new = UnderlyingBook(
+                ids=np.array([pos['id'] for pos in group]),
+                is_call=np.array([pos['type'].lower() == 'call' for pos in group]),
+                strike=np.array([pos['strike'] for pos in group], dtype=float),
+                quantity=np.array([pos['quantity'] for pos in group], dtype=float),
+                years_to_expiration=days / 365.0,
+                volatility=np.array(
+                    [pos.get('implied_volatility', self.default_volatility) for pos in group], dtype=float),
+                bucket=np.searchsorted(self.expiry_buckets, days, side='left')
+            )
+            book = self.books.get(underlying)
+            if book is not None:
+                for name in ('ids', 'is_call', 'strike', 'quantity', 'years_to_expiration', 'volatility', 'bucket'):
+                    setattr(new, name, np.concatenate([getattr(book, name), getattr(new, name)]))
+                new.spot = book.spot
+            self.books[underlying] = new
+            if new.spot is not None:
+                self._reprice(new)
+        
+        return ids
+
+    def remove_positions(self, underlying: str, ids: List[int]):
+        """Remove positions (by id) from one underlying's group"""
+        underlying = underlying.upper()
+        book = self.books.get(underlying)
+        if book is None:
+            return
+        keep = ~np.isin(book.ids, ids)
+        for name in ('ids', 'is_call', 'strike', 'quantity', 'years_to_expiration', 'volatility', 'bucket'):
+            setattr(book, name, getattr(book, name)[keep])
+        if not len(book.ids):
+            del self.books[underlying]
+        elif book.spot is not None:
+            self._reprice(book)
+
+    def update_spot(self, underlying: str, spot: float) -> Dict[str, float]:
+        """
+        Reprice one underlying at a new spot price
+        
+        Returns the underlying's new totals.
+        """
+        book = self.books[underlying.upper()]
+        book.spot = spot
+        self._reprice(book)
+        return dict(book.totals)
+
+    def update_spots(self, spots: Dict[str, float]):
+        """Reprice every underlying in spots (others are left untouched)"""
+        for underlying, spot in spots.items():
+            self.update_spot(underlying, spot)
+
+    def portfolio_totals(self) -> Dict[str, float]:
+        """Aggregate Greeks of the whole book (sum of the per-underlying totals)"""
+        return {
+            greek: float(sum(book.totals.get(greek, 0.0) for book in self.books.values()))
+            for greek in GREEKS
+        }
+
+    def underlying_totals(self, underlying: str) -> Dict[str, float]:
+        """Aggregate Greeks of one underlying at its last spot"""
+        return dict(self.books[underlying.upper()].totals)
+
+    def expiry_bucket_totals(self, underlying: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """Aggregate Greeks per expiry bucket, for one underlying or the whole book"""
+        if underlying is not None:
+            books = [self.books[underlying.upper()]]
+        else:
+            books = list(self.books.values())
+        totals = {greek: np.zeros(len(self.bucket_labels)) for greek in GREEKS}
+        for book in books:
+            for greek, values in book.bucket_totals.items():
+                totals[greek] += values
+        return {
+            label: {greek: float(totals[greek][i]) for greek in GREEKS}
+            for i, label in enumerate(self.bucket_labels)
+        }
+
+    def _reprice(self, book: UnderlyingBook):
+        """Recompute a group's Greeks and totals at book.spot"""
+        greeks = black_scholes_greeks(
+            book.spot, book.strike, book.years_to_expiration, book.volatility,
+            book.is_call, r=self.risk_free_rate
+        )
+        per_share = {greek: greeks[greek] for greek in GREEKS}
+        
+        scale = book.quantity * self.contract_multiplier
+        n_buckets = len(self.bucket_labels)
+        for greek, values in per_share.items():
+            position_values = values * scale
+            book.position_greeks[greek] = position_values
+            book.bucket_totals[greek] = np.bincount(book.bucket, weights=position_values, minlength=n_buckets)
+            book.totals[greek] = float(position_values.sum())
+
+    @staticmethod
+    def _bucket_labels(expiry_buckets: Tuple[int, ...]) -> List[str]:
+        labels = []
+        lower = 0
+        for upper in expiry_buckets:
+            labels.append(f"{lower}-{upper}d")
+            lower = upper + 1
+        labels.append(f">{expiry_buckets[-1]}d" if expiry_buckets else "all")
+        return labels
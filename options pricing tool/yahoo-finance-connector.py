@@ -1,14 +1,49 @@
 import yfinance as yf
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 import time
+import os
+import sys
+
+# The shared simple_*.py modules live in the repository root; make them importable
+# when this script is run from its own directory
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.append(REPO_DIR)
+
+from simple_greeks import GREEK_NAMES, black_scholes_greeks
+from simple_yahoo_connector import RateLimiter
 
 class YahooOptionsAPI:
-    def __init__(self):
-        """Initialize Yahoo Finance options data connector"""
-        self.rate_limit_delay = 1.0  # Delay between requests to avoid rate limiting
+    def __init__(self, max_workers: int = 8, ticker_factory: Optional[Callable[[str], object]] = None,
+                 rate_limit_delay: float = 1.0, burst: Optional[int] = None):
+        """
+        Initialize Yahoo Finance options data connector
+        
+        Parameters:
+        - max_workers: Worker pool size for concurrent fetches (get_options_chains)
+        - ticker_factory: Callable returning a yfinance.Ticker-like object for a
+          symbol (defaults to yfinance.Ticker; pass a stub for offline use)
+        - rate_limit_delay: Average seconds between requests (0 disables limiting)
+        - burst: Requests allowed back to back before the limit applies
+          (defaults to max_workers)
+        
+        Only the first `burst` requests run at once; the rest wait
+        rate_limit_delay each. With the defaults, the quote, expiration list
+        and 12 expirations (14 requests, burst 8) spend about 6 s on the
+        limiter, so raise burst to fetch a whole chain in about one round trip.
+        """
+        self.rate_limit_delay = rate_limit_delay  # Delay between requests to avoid rate limiting
+        self.max_workers = max(max_workers, 1)
+        self.ticker_factory = ticker_factory or yf.Ticker
+        # Concurrent fetches share one limiter averaging a request per rate_limit_delay
+        self.rate_limiter = RateLimiter(
+            rate=1 / rate_limit_delay if rate_limit_delay else None,
+            burst=burst or self.max_workers
+        )
         
     def get_options_chain(self, symbol: str, expiration_date: Optional[str] = None) -> pd.DataFrame:
         """
@@ -20,7 +55,7 @@ class YahooOptionsAPI:
         """
         try:
             # Get ticker object
-            ticker = yf.Ticker(symbol)
+            ticker = self.ticker_factory(symbol)
             time.sleep(self.rate_limit_delay)
             
             # Get all expiration dates if none specified
@@ -54,92 +89,120 @@ class YahooOptionsAPI:
             
             df = df.rename(columns=column_mapping)
             
-            # Calculate Greeks (Yahoo doesn't provide them directly)
-            df = self._calculate_basic_greeks(df, ticker.info['regularMarketPrice'])
-            
             # Add expiration date
             df['expiration_date'] = expiration_date
             
+            # Calculate Greeks (Yahoo doesn't provide them directly)
+            df = self._calculate_basic_greeks(df, ticker.info['regularMarketPrice'])
+            
             return df
             
         except Exception as e:
             print(f"Error fetching options chain: {str(e)}")
             return pd.DataFrame()
 
-    def _calculate_basic_greeks(self, df: pd.DataFrame, current_price: float) -> pd.DataFrame:
+    def get_options_chains(self, symbol: str, expiration_dates: Optional[List[str]] = None,
+                           max_expiry_count: Optional[int] = None) -> pd.DataFrame:
         """
-        Calculate basic Greeks approximations
-        Note: These are rough approximations. For accurate Greeks, 
-        a proper options pricing model should be used.
-        """
-        risk_free_rate = 0.05  # Approximate risk-free rate
+        Get options chains for several expirations concurrently
         
-        df['delta'] = df.apply(
-            lambda row: self._calculate_delta(
-                current_price,
-                row['strike_price'],
-                row['implied_volatility'],
-                row['option_type']
-            ),
-            axis=1
-        )
+        The quote and every expiration are fetched in parallel through a bounded
+        worker pool sharing self.rate_limiter, instead of one sleep-separated
+        request after another.
         
-        # Approximate other Greeks
-        df['gamma'] = df.apply(
-            lambda row: self._calculate_gamma(
-                current_price,
-                row['strike_price'],
-                row['implied_volatility']
-            ),
-            axis=1
-        )
+        Parameters:
+        - symbol: Stock symbol
+        - expiration_dates: Expiration dates to fetch (YYYY-MM-DD); all listed
+          expirations when omitted
+        - max_expiry_count: Optional limit on the number of (nearest) expirations
+        """
+        try:
+            return self.get_quote_and_chains(symbol, expiration_dates, max_expiry_count)[1]
+        except Exception as e:
+            print(f"Error fetching options chains: {str(e)}")
+            return pd.DataFrame()
+
+    def get_quote_and_chains(self, symbol: str, expiration_dates: Optional[List[str]] = None,
+                             max_expiry_count: Optional[int] = None,
+                             max_workers: Optional[int] = None) -> Tuple[Dict, pd.DataFrame]:
+        """
+        Get the quote info and the options chains for a symbol in one go
         
-        df['theta'] = df.apply(
-            lambda row: self._calculate_theta(
-                current_price,
-                row['strike_price'],
-                row['implied_volatility'],
-                row['option_type']
-            ),
-            axis=1
-        )
+        Same as get_options_chains, but also returns the ticker info fetched
+        for the current price, and raises instead of returning an empty frame
+        when a request fails.
         
-        df['vega'] = df.apply(
-            lambda row: self._calculate_vega(
-                current_price,
-                row['strike_price'],
-                row['implied_volatility']
-            ),
-            axis=1
-        )
+        Parameters:
+        - symbol, expiration_dates, max_expiry_count: As in get_options_chains
+        - max_workers: Worker pool size for this symbol (defaults to self.max_workers)
         
-        return df
-
-    def _calculate_delta(self, S: float, K: float, sigma: float, option_type: str) -> float:
-        """Approximate delta using simple model"""
-        if option_type == 'CALL':
-            if S > K:
-                return 0.7 + (S - K) / (S * sigma) * 0.3
-            else:
-                return 0.3 - (K - S) / (S * sigma) * 0.3
-        else:
-            if S > K:
-                return -0.3 + (S - K) / (S * sigma) * 0.3
-            else:
-                return -0.7 - (K - S) / (S * sigma) * 0.3
-
-    def _calculate_gamma(self, S: float, K: float, sigma: float) -> float:
-        """Approximate gamma"""
-        return 0.1 * np.exp(-(S - K)**2 / (2 * (S * sigma)**2))
+        Returns (info, chain); the chain is empty when there are no expirations.
+        """
+        ticker = self.ticker_factory(symbol)
+        
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_workers) as executor:
+            def fetch_info():
+                self.rate_limiter.acquire()
+                return ticker.info
 
-    def _calculate_theta(self, S: float, K: float, sigma: float, option_type: str) -> float:
-        """Approximate theta"""
-        atm_factor = -S * sigma / np.sqrt(365)
-        return atm_factor * np.exp(-(S - K)**2 / (2 * (S * sigma)**2))
+            def fetch_expiry(expiration_date):
+                self.rate_limiter.acquire()
+                return expiration_date, ticker.option_chain(expiration_date)
+            
+            info_future = executor.submit(fetch_info)
+            
+            if not expiration_dates:
+                self.rate_limiter.acquire()
+                expiration_dates = list(ticker.options)
+            if max_expiry_count is not None:
+                expiration_dates = expiration_dates[:max_expiry_count]
+            if not expiration_dates:
+                return info_future.result(), pd.DataFrame()
+            
+            chains = list(executor.map(fetch_expiry, expiration_dates))
+            info = info_future.result()
+        
+        frames = []
+        for expiration_date, options in chains:
+            calls = options.calls.copy()
+            calls['option_type'] = 'CALL'
+            puts = options.puts.copy()
+            puts['option_type'] = 'PUT'
+            df = pd.concat([calls, puts])
+            df['expiration_date'] = expiration_date
+            frames.append(df)
+        
+        df = pd.concat(frames, ignore_index=True)
+        df = df.rename(columns={
+            'strike': 'strike_price',
+            'openInterest': 'open_interest',
+            'impliedVolatility': 'implied_volatility'
+        })
+        return info, self._calculate_basic_greeks(df, info['regularMarketPrice'])
 
-    def _calculate_vega(self, S: float, K: float, sigma: float) -> float:
-        """Approximate vega"""
-        return S * np.exp(-(S - K)**2 / (2 * (S * sigma)**2)) / 100
+    def _calculate_basic_greeks(self, df: pd.DataFrame, current_price: float) -> pd.DataFrame:
+        """
+        Calculate Black-Scholes Greeks for the whole chain in one vectorized pass
+        
+        Time to expiry is measured from now to the 16:00 close on each row's
+        expiration_date. Theta is per calendar day, vega and rho per 1% move.
+        Expired rows and rows without a usable IV get a 1/-1/0 delta by
+        moneyness and zero for the other Greeks.
+        """
+        risk_free_rate = 0.05  # Approximate risk-free rate
+        
+        S = float(current_price)
+        K = pd.to_numeric(df['strike_price'], errors='coerce').to_numpy(dtype=float)
+        sigma = pd.to_numeric(df['implied_volatility'], errors='coerce').to_numpy(dtype=float)
+        is_call = (df['option_type'] == 'CALL').to_numpy()
+        expiry_close = pd.to_datetime(df['expiration_date']) + pd.Timedelta(hours=16)
+        T = ((expiry_close - pd.Timestamp.now()).dt.total_seconds() / (365 * 24 * 3600)).to_numpy()
+        
+        greeks = black_scholes_greeks(S, K, T, sigma, is_call, r=risk_free_rate)
+        for name in GREEK_NAMES:
+            df[name] = greeks[name]
+        
+        return df
 
     def get_historical_data(self, symbol: str, period: str = "1y", interval: str = "1d") -> pd.DataFrame:
         """
@@ -151,7 +214,7 @@ class YahooOptionsAPI:
         - interval: Valid intervals: 1m,2m,5m,15m,30m,60m,90m,1h,1d,5d,1wk,1mo,3mo
         """
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self.ticker_factory(symbol)
             df = ticker.history(period=period, interval=interval)
             time.sleep(self.rate_limit_delay)
             return df
@@ -162,7 +225,7 @@ class YahooOptionsAPI:
     def get_quote(self, symbol: str) -> Dict:
         """Get current quote and info for a symbol"""
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = self.ticker_factory(symbol)
             time.sleep(self.rate_limit_delay)
             return ticker.info
         except Exception as e:
@@ -170,8 +233,13 @@ class YahooOptionsAPI:
             return {}
 
 class OptionsDataManager:
-    def __init__(self):
-        self.api = YahooOptionsAPI()
+    def __init__(self, ticker_factory: Optional[Callable[[str], object]] = None):
+        """
+        Parameters:
+        - ticker_factory: Optional market data provider hook (e.g. a record/replay
+          provider's ticker method); live yfinance data when omitted
+        """
+        self.api = YahooOptionsAPI(ticker_factory=ticker_factory)
         
     def fetch_complete_data(self, symbol: str) -> Dict:
         """Fetch all relevant data for a symbol"""
@@ -1,11 +1,18 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import Dict, List, Optional, Union
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import json
 import logging
-from simple_yahoo_connector import SimpleYahooConnector
+import os
+import numpy as np
+from simple_yahoo_connector import SimpleYahooConnector, options_frame_to_records
+from simple_chain_cache import CachedYahooConnector
+from simple_market_data import RecordingProvider, ReplayProvider, YFinanceProvider
 from simple_scenario_analyzer import SimpleScenarioAnalyzer
 
 # Configure logging
@@ -23,69 +30,233 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-class ScenarioRequest(BaseModel):
-    ticker: str
+class ScenarioGrid(BaseModel):
+    """Scenario grid, paging and filter settings shared by the analyze endpoints"""
     min_change: float
     max_change: float
     step_size: float
     max_expiry_count: Optional[int] = 3
+    # American prices use the Barone-Adesi-Whaley approximation
+    exercise_style: Literal['european', 'american'] = 'european'
+    # Delta-gamma approximation for scenarios within approximation_max_move percent of the
+    # current price, with full repricing wherever the estimated error exceeds approximation_max_error dollars
+    approximate: bool = False
+    approximation_max_move: float = Field(5.0, gt=0)
+    approximation_max_error: float = Field(0.05, gt=0)
+    # Pagination over each scenario/expiry block, ranked by profit potential
+    top_n: Optional[int] = Field(None, ge=1)
+    offset: int = Field(0, ge=0)
+    # Contract filters applied before ranking
+    option_type: Optional[Literal['call', 'put']] = None
+    min_volume: Optional[int] = None
+    min_open_interest: Optional[int] = None
+    min_profit_potential: Optional[float] = None
+
+class ScenarioRequest(ScenarioGrid):
+    ticker: str
+
+class SurfaceRequest(ScenarioRequest):
+    # Absolute IV shifts (0.05 = +5 vol points) and days elapsed, swept together with the spot grid
+    iv_shifts: List[float] = [0.0]
+    days_forward: List[int] = [0]
+
+class BatchScenarioRequest(ScenarioGrid):
+    tickers: List[str] = Field(..., min_length=1, max_length=500)
+    stream: bool = False
+
+# Market data is cached per (ticker, expiry); see CachedYahooConnector for the policy
+CHAIN_CACHE_TTL_SECONDS = 15.0
+CHAIN_CACHE_STALE_SECONDS = 120.0
+CHAIN_CACHE_MAX_ENTRIES = 512
+
+def _market_data_provider():
+    """
+    Select the market data provider from the environment
+    
+    MARKET_DATA_REPLAY_DIR serves recorded data offline (with
+    MARKET_DATA_REPLAY_LATENCY seconds of synthetic latency per request);
+    MARKET_DATA_RECORD_DIR records live data there while serving it.
+    """
+    replay_dir = os.environ.get("MARKET_DATA_REPLAY_DIR")
+    if replay_dir:
+        latency = float(os.environ.get("MARKET_DATA_REPLAY_LATENCY", "0"))
+        logger.info(f"Replaying market data from {replay_dir} with {latency}s latency")
+        return ReplayProvider(replay_dir, latency=latency)
+    record_dir = os.environ.get("MARKET_DATA_RECORD_DIR")
+    if record_dir:
+        logger.info(f"Recording market data to {record_dir}")
+        return RecordingProvider(record_dir)
+    return YFinanceProvider()
 
-yahoo = SimpleYahooConnector()
+# Set IMPLIED_VOLATILITY_FROM_MID=1 to price from bid/ask mids and re-derive IV from them
+yahoo = CachedYahooConnector(
+    SimpleYahooConnector(
+        ticker_factory=_market_data_provider().ticker,
+        implied_volatility_from_mid=os.environ.get("IMPLIED_VOLATILITY_FROM_MID") == "1"
+    ),
+    ttl=CHAIN_CACHE_TTL_SECONDS,
+    stale_ttl=CHAIN_CACHE_STALE_SECONDS,
+    max_entries=CHAIN_CACHE_MAX_ENTRIES
+)
 analyzer = SimpleScenarioAnalyzer()
 
-@app.post("/api/analyze")
-async def analyze_scenarios(request: ScenarioRequest):
-    try:
-        logger.info(f"Received request for ticker: {request.ticker}")
-        
-        # Get current stock price and options
-        stock_price = yahoo.get_stock_price(request.ticker)
-        logger.info(f"Current stock price: {stock_price}")
-        
-        options_by_date = yahoo.get_options_chain(request.ticker, request.max_expiry_count)
-        logger.info(f"Retrieved options for {len(options_by_date)} expiration dates")
-        
-        if not stock_price or not options_by_date:
-            raise HTTPException(status_code=404, detail="Data not found")
+# Number of scenarios priced per batch when streaming results
+STREAM_SCENARIO_CHUNK_SIZE = 10
+# Number of tickers fetched and priced at once by /api/analyze/batch
+BATCH_TICKER_WORKERS = 16
+# Upper bound on scenario cells x contracts priced by one /api/analyze/surface request
+MAX_SURFACE_CELLS = 5_000_000
+
+def _load_market_data(ticker: str, max_expiry_count: Optional[int]):
+    """Fetch the current stock price and options frames for a ticker"""
+    logger.info(f"Received request for ticker: {ticker}")
+    
+    # Get current stock price and options (fetched concurrently)
+    stock_price, options_frames = yahoo.get_quote_and_frames(ticker, max_expiry_count)
+    logger.info(f"Current stock price: {stock_price}")
+    logger.info(f"Retrieved options for {len(options_frames)} expiration dates")
+    
+    if not stock_price or not options_frames:
+        raise HTTPException(status_code=404, detail="Data not found")
+    
+    return stock_price, options_frames
+
+def _scenario_changes(request: ScenarioGrid) -> List[float]:
+    """Build the list of percent price changes covered by a scenario request"""
+    scenario_changes = []
+    current_change = request.min_change
+    while current_change <= request.max_change:
+        scenario_changes.append(current_change)
+        current_change += request.step_size
+    return scenario_changes
+
+def _contract_filter_mask(frame, request: ScenarioGrid) -> np.ndarray:
+    """Boolean mask of the contracts in an options frame that pass the request filters"""
+    mask = np.ones(len(frame), dtype=bool)
+    if request.option_type:
+        mask &= (frame['option_type'] == request.option_type).to_numpy()
+    if request.min_volume is not None:
+        mask &= frame['volume'].to_numpy() >= request.min_volume
+    if request.min_open_interest is not None:
+        mask &= frame['open_interest'].to_numpy() >= request.min_open_interest
+    return mask
+
+def _select_ranked(values: np.ndarray, candidates: np.ndarray, offset: int = 0,
+                   top_n: Optional[int] = None) -> np.ndarray:
+    """
+    Return candidate indices ranked by descending value, sliced to [offset, offset + top_n)
+    
+    When only a page is requested the top offset + top_n candidates are found
+    with a partial selection (np.partition) and only those are sorted. Ties
+    keep contract order, matching a stable full sort.
+    """
+    candidate_values = values[candidates]
+    
+    if top_n is None or offset + top_n >= len(candidates):
+        order = np.argsort(-candidate_values, kind="stable")
+        return candidates[order][offset:None if top_n is None else offset + top_n]
+    
+    k = offset + top_n
+    kth_value = -np.partition(-candidate_values, k - 1)[k - 1]
+    above = candidates[candidate_values > kth_value]
+    tied = candidates[candidate_values == kth_value][:k - len(above)]
+    selected = np.concatenate([above, tied])
+    
+    order = np.lexsort((selected, -values[selected]))
+    return selected[order][offset:k]
+
+def _records_for(frame, records_cache: Dict[int, dict], indices: np.ndarray) -> List[dict]:
+    """Return option dictionaries for the given frame rows, converting only rows not yet cached"""
+    missing = [j for j in indices if j not in records_cache]
+    if missing:
+        records_cache.update(zip(missing, options_frame_to_records(frame.iloc[missing])))
+    return [records_cache[j] for j in indices]
+
+def _iter_scenario_results(stock_price: float, options_frames: Dict, scenario_changes: List[float],
+                           request: ScenarioGrid, chunk_size: Optional[int] = None):
+    """
+    Yield (scenario_key, scenario_result) pairs in grid order
+    
+    Scenarios are priced in batches of chunk_size (all at once by default),
+    so a streaming caller gets the first results before the whole grid is done.
+    Only the contracts on the requested page are turned into dictionaries.
+    With request.approximate, each scenario also reports per expiration date
+    whether it was priced by the delta-gamma approximation.
+    """
+    chunk_size = chunk_size or max(len(scenario_changes), 1)
+    # Option dictionaries are built on first use, so unselected contracts never are
+    records_by_date = {expiry_date: {} for expiry_date in options_frames}
+    filter_masks = {
+        expiry_date: _contract_filter_mask(frame, request)
+        for expiry_date, frame in options_frames.items()
+    }
+    
+    for start in range(0, len(scenario_changes), chunk_size):
+        chunk_changes = scenario_changes[start:start + chunk_size]
+        scenario_prices = [stock_price * (1 + change / 100) for change in chunk_changes]
         
-        results = {}
-        current_change = request.min_change
+        # Price every option for every scenario in the chunk in one batch per expiration date
+        analyzed_by_scenario = [{} for _ in chunk_changes]
+        totals_by_scenario = [{} for _ in chunk_changes]
+        approximated_by_scenario = [{} for _ in chunk_changes]
         
-        while current_change <= request.max_change:
-            # Calculate new stock price for this scenario
-            new_stock_price = stock_price * (1 + current_change / 100)
-            logger.info(f"Analyzing scenario: {current_change}% change, new price: {new_stock_price}")
-            
-            # Analyze options for each expiration date
-            analyzed_by_date = {}
+        for expiry_date, frame in options_frames.items():
+            analysis = analyzer.calculate_profit_potential_batch(
+                scenario_prices=scenario_prices,
+                strikes=frame['strike'].to_numpy(),
+                expirations=frame['expiration'].to_numpy(),
+                implied_vols=frame['implied_volatility'].to_numpy(),
+                option_types=(frame['option_type'] == 'call').to_numpy(),
+                current_option_prices=frame['current_option_price'].to_numpy(),
+                exercise_style=request.exercise_style,
+                current_price=stock_price if request.approximate else None,
+                max_approximation_move=request.approximation_max_move,
+                max_approximation_error=request.approximation_max_error
+            )
+            filter_mask = filter_masks[expiry_date]
             
-            for expiry_date, options_list in options_by_date.items():
-                # Analyze all options for this price point and expiration
-                analyzed_options = []
-                for option in options_list:
-                    analysis = analyzer.calculate_profit_potential(
-                        current_price=stock_price,
-                        new_stock_price=new_stock_price,
-                        option_data=option
-                    )
-                    if analysis:
-                        analyzed_option = {
-                            **option,
-                            "theoretical_value": analysis["new_option_price"],
-                            "profit_potential": analysis["percent_change"]
-                        }
-                        analyzed_options.append(analyzed_option)
+            for i, analyzed_by_date in enumerate(analyzed_by_scenario):
+                theoretical_values = analysis["new_option_prices"][i]
+                profit_potentials = analysis["percent_changes"][i]
                 
-                # Sort by profit potential and get best performers
-                analyzed_options.sort(key=lambda x: x.get("profit_potential", 0), reverse=True)
-                analyzed_by_date[expiry_date] = analyzed_options
-            
-            results[str(current_change)] = {
+                scenario_mask = filter_mask
+                if request.min_profit_potential is not None:
+                    scenario_mask = scenario_mask & (profit_potentials >= request.min_profit_potential)
+                candidates = np.flatnonzero(scenario_mask)
+                
+                # Rank by profit potential and keep only the requested page
+                selected = _select_ranked(profit_potentials, candidates, request.offset, request.top_n)
+                options_list = _records_for(frame, records_by_date[expiry_date], selected)
+                analyzed_by_date[expiry_date] = [
+                    {
+                        **option,
+                        "theoretical_value": float(theoretical_values[j]),
+                        "profit_potential": float(profit_potentials[j])
+                    }
+                    for j, option in zip(selected, options_list)
+                ]
+                totals_by_scenario[i][expiry_date] = len(candidates)
+                approximated_by_scenario[i][expiry_date] = bool(analysis["approximated"][i])
+        
+        for change, new_stock_price, analyzed_by_date, total_by_date, approximated_by_date in zip(
+                chunk_changes, scenario_prices, analyzed_by_scenario, totals_by_scenario,
+                approximated_by_scenario):
+            scenario_result = {
                 "new_stock_price": new_stock_price,
-                "options_by_date": analyzed_by_date
+                "options_by_date": analyzed_by_date,
+                "total_by_date": total_by_date
             }
-            
-            current_change += request.step_size
+            if request.approximate:
+                scenario_result["approximated_by_date"] = approximated_by_date
+            yield str(change), scenario_result
+
+@app.post("/api/analyze")
+async def analyze_scenarios(request: ScenarioRequest):
+    try:
+        stock_price, options_frames = _load_market_data(request.ticker, request.max_expiry_count)
+        
+        results = dict(_iter_scenario_results(
+            stock_price, options_frames, _scenario_changes(request), request))
         
         response_data = {
             "ticker": request.ticker,
@@ -99,6 +270,161 @@ async def analyze_scenarios(request: ScenarioRequest):
         logger.error(f"Error in analyze_scenarios: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/analyze/stream")
+async def analyze_scenarios_stream(request: ScenarioRequest):
+    """
+    Streaming variant of /api/analyze returning newline-delimited JSON
+    
+    The first line holds the ticker and current price, followed by one line
+    per scenario ({"scenario", "new_stock_price", "options_by_date"}) as soon
+    as it has been computed.
+    """
+    try:
+        stock_price, options_frames = _load_market_data(request.ticker, request.max_expiry_count)
+    except Exception as e:
+        logger.error(f"Error in analyze_scenarios_stream: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def generate_lines():
+        yield json.dumps({"ticker": request.ticker, "current_price": stock_price}) + "\n"
+        try:
+            for scenario, scenario_result in _iter_scenario_results(
+                    stock_price, options_frames, _scenario_changes(request), request,
+                    chunk_size=STREAM_SCENARIO_CHUNK_SIZE):
+                yield json.dumps({"scenario": scenario, **scenario_result}) + "\n"
+            logger.info(f"Streaming analysis complete for {request.ticker}")
+        except Exception as e:
+            logger.error(f"Error streaming scenarios for {request.ticker}: {str(e)}")
+            yield json.dumps({"error": str(e)}) + "\n"
+    
+    return StreamingResponse(generate_lines(), media_type="application/x-ndjson")
+
+@app.post("/api/analyze/surface")
+async def analyze_surface(request: SurfaceRequest):
+    """
+    Reprice the chain over a spot x IV shift x days-forward grid
+    
+    Each option gets "theoretical_values" and "profit_potentials" cubes
+    indexed [spot_change][iv_shift][days_forward].
+    """
+    try:
+        stock_price, options_frames = _load_market_data(request.ticker, request.max_expiry_count)
+    except Exception as e:
+        logger.error(f"Error in analyze_surface: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    spot_changes = _scenario_changes(request)
+    contract_count = sum(len(frame) for frame in options_frames.values())
+    cells = len(spot_changes) * len(request.iv_shifts) * len(request.days_forward) * contract_count
+    if cells > MAX_SURFACE_CELLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Surface too large ({cells} cells, limit {MAX_SURFACE_CELLS}); narrow the grid or filters")
+    
+    try:
+        options_by_date = {}
+        for expiry_date, frame in options_frames.items():
+            frame = frame[_contract_filter_mask(frame, request)]
+            surface = analyzer.scenario_surface(
+                current_price=stock_price,
+                spot_changes=spot_changes,
+                iv_shifts=request.iv_shifts,
+                days_forward=request.days_forward,
+                strikes=frame['strike'].to_numpy(),
+                expirations=frame['expiration'].to_numpy(),
+                implied_vols=frame['implied_volatility'].to_numpy(),
+                option_types=(frame['option_type'] == 'call').to_numpy(),
+                current_option_prices=frame['current_option_price'].to_numpy(),
+                exercise_style=request.exercise_style
+            )
+            
+            # Move the contract axis first so each option carries its own cube
+            theoretical_values = np.moveaxis(surface["new_option_prices"], -1, 0).tolist()
+            profit_potentials = np.moveaxis(surface["percent_changes"], -1, 0).tolist()
+            options_by_date[expiry_date] = [
+                {
+                    **option,
+                    "theoretical_values": values,
+                    "profit_potentials": potentials
+                }
+                for option, values, potentials in zip(
+                    options_frame_to_records(frame), theoretical_values, profit_potentials)
+            ]
+        
+        response_data = {
+            "ticker": request.ticker,
+            "current_price": stock_price,
+            "spot_changes": spot_changes,
+            "iv_shifts": request.iv_shifts,
+            "days_forward": request.days_forward,
+            "options_by_date": options_by_date
+        }
+        logger.info(f"Surface analysis complete for {request.ticker}")
+        return JSONResponse(content=response_data)
+    
+    except Exception as e:
+        logger.error(f"Error in analyze_surface: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _analyze_ticker(ticker: str, request: BatchScenarioRequest) -> Dict:
+    """Fetch and analyze one ticker of a batch request"""
+    stock_price, options_frames = _load_market_data(ticker, request.max_expiry_count)
+    results = dict(_iter_scenario_results(
+        stock_price, options_frames, _scenario_changes(request), request))
+    return {
+        "ticker": ticker,
+        "current_price": stock_price,
+        "results": results
+    }
+
+def _iter_batch_results(request: BatchScenarioRequest):
+    """
+    Analyze every ticker of a batch request concurrently
+    
+    Yields (ticker, result, error) as each ticker finishes, so a slow or
+    failing ticker does not hold up or abort the rest of the batch.
+    """
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in request.tickers))
+    with ThreadPoolExecutor(max_workers=min(BATCH_TICKER_WORKERS, len(tickers))) as executor:
+        futures = {executor.submit(_analyze_ticker, ticker, request): ticker for ticker in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                yield ticker, future.result(), None
+            except Exception as e:
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                logger.error(f"Error analyzing {ticker} in batch: {detail}")
+                yield ticker, None, detail
+
+@app.post("/api/analyze/batch")
+async def analyze_scenarios_batch(request: BatchScenarioRequest):
+    """
+    Analyze a watchlist of tickers over one shared scenario grid
+    
+    Returns {"results": {ticker: ...}, "errors": {ticker: message}}, or with
+    stream=true, newline-delimited JSON with one line per ticker in order of
+    completion ({"ticker", "current_price", "results"} or {"ticker", "error"}).
+    """
+    if request.stream:
+        def generate_lines():
+            for ticker, result, error in _iter_batch_results(request):
+                yield json.dumps(result if error is None else {"ticker": ticker, "error": error}) + "\n"
+        
+        return StreamingResponse(generate_lines(), media_type="application/x-ndjson")
+
+    def collect():
+        results, errors = {}, {}
+        for ticker, result, error in _iter_batch_results(request):
+            if error is None:
+                results[ticker] = result
+            else:
+                errors[ticker] = error
+        return {"results": results, "errors": errors}
+    
+    response_data = await run_in_threadpool(collect)
+    logger.info(f"Batch analysis complete for {len(response_data['results'])} tickers")
+    return JSONResponse(content=response_data)
+
 @app.get("/api/options/{ticker}")
 async def get_options(ticker: str):
     try:
@@ -117,5 +443,10 @@ async def get_options(ticker: str):
         logger.error(f"Error in get_options: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Market data cache hit/miss counters"""
+    return yahoo.stats()
+
 # Mount the static files directory AFTER the API routes
 app.mount("/", StaticFiles(directory=".", html=True), name="static")
@@ -0,0 +1,176 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import logging
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Tuple
+
+import pandas as pd
+
+from simple_yahoo_connector import SimpleYahooConnector, options_frame_to_records
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a time-to-live and stale-while-revalidate
+    
+    Entries younger than `ttl` seconds are served as-is. Entries up to
+    `ttl + stale_ttl` seconds old are still served, while a single background
+    refresh replaces them. Older entries (and missing keys) are loaded
+    synchronously, with concurrent requests for the same key sharing one load.
+    At most `max_entries` entries are kept; the least recently used is evicted.
+    """
+    def __init__(self, ttl: float = 15.0, stale_ttl: float = 120.0, max_entries: int = 512,
+                 refresh_workers: int = 2):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[object, float]]" = OrderedDict()
+        self._loading: Dict[Hashable, Future] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=refresh_workers)
+        self._counters = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'evictions': 0
+        }
+
+    def get(self, key: Hashable, loader: Callable[[], object]):
+        """Return the cached value for key, calling loader() when it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, fetched_at = entry
+                age = time.monotonic() - fetched_at
+                if age <= self.ttl:
+                    self._counters['hits'] += 1
+                    self._entries.move_to_end(key)
+                    return value
+                if age <= self.ttl + self.stale_ttl:
+                    self._counters['stale_hits'] += 1
+                    self._entries.move_to_end(key)
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        self._refresh_executor.submit(self._refresh, key, loader)
+                    return value
+            
+            self._counters['misses'] += 1
+            future = self._loading.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._loading[key] = future
+        
+        if not owner:
+            return future.result()
+        
+        try:
+            value = loader()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            self._store(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current size"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['stale_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Drop all cached entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key: Hashable, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def _refresh(self, key: Hashable, loader: Callable[[], object]):
+        try:
+            self._store(key, loader())
+            with self._lock:
+                self._counters['refreshes'] += 1
+        except Exception as e:
+            logger.error(f"Error refreshing cache entry {key}: {str(e)}")
+            with self._lock:
+                self._counters['refresh_errors'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+class CachedYahooConnector:
+    """
+    SimpleYahooConnector front end that caches quotes, expiration lists and
+    per-expiration chain frames in a TTLCache keyed by (ticker, item)
+    """
+    def __init__(self, connector: SimpleYahooConnector = None, ttl: float = 15.0,
+                 stale_ttl: float = 120.0, max_entries: int = 512):
+        self.connector = connector or SimpleYahooConnector()
+        self.cache = TTLCache(ttl=ttl, stale_ttl=stale_ttl, max_entries=max_entries)
+
+    def get_stock_price(self, ticker):
+        """Get current stock price for a ticker"""
+        ticker = ticker.upper()
+        return self.cache.get((ticker, 'quote'), lambda: self.connector.get_stock_price(ticker))
+
+    def get_expirations(self, ticker) -> List[str]:
+        """Get all listed expiration dates for a ticker"""
+        ticker = ticker.upper()
+        return self.cache.get((ticker, 'expirations'), lambda: self.connector.get_expirations(ticker))
+
+    def get_expiry_frame(self, ticker, expiry: str) -> pd.DataFrame:
+        """Get the chain frame for a single expiration date"""
+        ticker = ticker.upper()
+        return self.cache.get((ticker, expiry), lambda: self.connector.get_expiry_frame(ticker, expiry))
+
+    def get_options_frames(self, ticker, max_expiry_count: int = 3) -> Dict[str, pd.DataFrame]:
+        """Get options frames for the nearest expirations, fetching uncached ones in parallel"""
+        return self.get_quote_and_frames(ticker, max_expiry_count)[1]
+
+    def get_options_chain(self, ticker, max_expiry_count: int = 3) -> Dict[str, List[dict]]:
+        """Get options chain for a ticker, organized by expiration date"""
+        options_frames = self.get_options_frames(ticker, max_expiry_count)
+        return {
+            expiry: options_frame_to_records(frame)
+            for expiry, frame in options_frames.items()
+        }
+
+    def get_quote_and_frames(self, ticker, max_expiry_count: int = 3):
+        """
+        Get the current stock price and the options frames for a ticker
+        
+        Cached items are returned immediately; the rest are fetched in parallel
+        on a pool as large as the underlying connector's. Greeks are computed
+        from the (possibly cached) quote on copies of the cached frames.
+        """
+        with ThreadPoolExecutor(max_workers=self.connector.max_workers) as executor:
+            price_future = executor.submit(self.get_stock_price, ticker)
+            expirations = self.get_expirations(ticker)[:max_expiry_count]
+            frames = executor.map(lambda expiry: self.get_expiry_frame(ticker, expiry), expirations)
+            options_frames = dict(zip(expirations, frames))
+            stock_price = price_future.result()
+        return stock_price, self.connector.add_greeks(options_frames, stock_price)
+
+    def stats(self) -> Dict[str, float]:
+        """Return cache hit/miss counters"""
+        return self.cache.stats()
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+# Greeks reported per contract: theta per calendar day, vega and rho per 1% move
+GREEK_NAMES = ['delta', 'gamma', 'theta', 'vega', 'rho']
+# Optional higher-order Greeks: vanna per 1% vol, charm per day, vomma per (1% vol)^2, speed per $1
+HIGHER_ORDER_GREEK_NAMES = ['vanna', 'charm', 'vomma', 'speed']
+
+def black_scholes_greeks(S, K, T, sigma, is_call, r=0.05, higher_order=False):
+    """
+    Closed-form Black-Scholes Greeks for arrays of contracts
+    
+    All inputs are broadcast against each other; d1/d2 and the normal
+    density/CDF terms are computed once and shared between the Greeks.
+    Expired contracts and contracts without a usable IV get a delta of 1/-1/0
+    by moneyness and zero for every other Greek.
+    
+    Args:
+        S: Stock price(s)
+        K: Strike price(s)
+        T: Time(s) to expiration in years
+        sigma: Implied volatility(ies)
+        is_call: Boolean call mask
+        r: Risk-free rate
+        higher_order: Also return vanna, charm, vomma and speed
+    
+    Returns:
+        Dictionary of arrays: delta, gamma, theta (per day), vega and rho
+        (per 1% change in volatility / rates), plus HIGHER_ORDER_GREEK_NAMES
+        when higher_order is set
+    """
+    S, K, T, sigma = (np.asarray(x, dtype=float) for x in (S, K, T, sigma))
+    is_call = np.asarray(is_call, dtype=bool)
+    
+    valid = (T > 0) & (sigma > 0) & (S > 0) & (K > 0)
+    safe_S = np.where(valid, S, 1.0)
+    safe_K = np.where(valid, K, 1.0)
+    safe_T = np.where(valid, T, 1.0)
+    safe_sigma = np.where(valid, sigma, 1.0)
+    
+    sqrt_T = np.sqrt(safe_T)
+    d1 = (np.log(safe_S/safe_K) + (r + safe_sigma**2/2)*safe_T) / (safe_sigma*sqrt_T)
+    d2 = d1 - safe_sigma*sqrt_T
+    pdf_d1 = norm.pdf(d1)
+    cdf_d1 = norm.cdf(d1)
+    discounted_K = safe_K*np.exp(-r*safe_T)
+    cdf_d2 = np.where(is_call, norm.cdf(d2), -norm.cdf(-d2))
+    
+    delta = np.where(is_call, cdf_d1, cdf_d1 - 1)
+    gamma = pdf_d1 / (safe_S*safe_sigma*sqrt_T)
+    theta = (-safe_S*pdf_d1*safe_sigma / (2*sqrt_T) - r*discounted_K*cdf_d2) / 365
+    vega = safe_S*pdf_d1*sqrt_T / 100
+    rho = discounted_K*safe_T*cdf_d2 / 100
+    
+    in_the_money = np.where(is_call, S > K, K > S)
+    expired_delta = np.where(in_the_money, np.where(is_call, 1.0, -1.0), 0.0)
+    
+    greeks = {
+        'delta': np.where(valid, delta, expired_delta),
+        'gamma': np.where(valid, gamma, 0.0),
+        'theta': np.where(valid, theta, 0.0),
+        'vega': np.where(valid, vega, 0.0),
+        'rho': np.where(valid, rho, 0.0)
+    }
+    if higher_order:
+        # Delta sensitivity to volatility, and to the passage of time (same for calls and puts without dividends)
+        vanna = -pdf_d1*d2 / safe_sigma
+        charm = -pdf_d1*(2*r*safe_T - d2*safe_sigma*sqrt_T) / (2*safe_T*safe_sigma*sqrt_T)
+        # Vega sensitivity to volatility, and gamma sensitivity to the underlying
+        vomma = safe_S*pdf_d1*sqrt_T*d1*d2 / safe_sigma
+        speed = -gamma/safe_S * (d1/(safe_sigma*sqrt_T) + 1)
+        greeks.update({
+            'vanna': np.where(valid, vanna / 100, 0.0),
+            'charm': np.where(valid, charm / 365, 0.0),
+            'vomma': np.where(valid, vomma / 10000, 0.0),
+            'speed': np.where(valid, speed, 0.0)
+        })
+    return greeks
+
+def add_greeks(frame: pd.DataFrame, stock_price: float, risk_free_rate: float = 0.05) -> pd.DataFrame:
+    """
+    Return a copy of a chain frame (see simple_yahoo_connector.OPTION_COLUMNS)
+    with its delta, gamma, theta and vega columns computed from the stock price
+    
+    Args:
+        frame: Chain frame with strike, expiration (years), implied_volatility
+            and option_type columns
+        stock_price: Current stock price
+        risk_free_rate: Risk-free rate
+    
+    Returns:
+        New DataFrame; the input frame is left untouched
+    """
+    if not stock_price or frame.empty:
+        return frame
+    
+    greeks = black_scholes_greeks(
+        S=stock_price,
+        K=frame['strike'].to_numpy(dtype=float),
+        T=frame['expiration'].to_numpy(dtype=float),
+        sigma=frame['implied_volatility'].to_numpy(dtype=float),
+        is_call=(frame['option_type'] == 'call').to_numpy(),
+        r=risk_free_rate
+    )
+    return frame.assign(**{name: greeks[name] for name in ['delta', 'gamma', 'theta', 'vega']})
@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+import pandas as pd
+import yfinance as yf
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Same shape as the object returned by yfinance.Ticker.option_chain
+OptionChain = namedtuple('OptionChain', ['calls', 'puts'])
+
+class YFinanceProvider:
+    """
+    Live market data provider backed by yfinance
+    
+    A provider's ticker(symbol) returns an object with the yfinance.Ticker
+    surface the project uses: info, options, option_chain(expiry) and
+    history(period, interval). Pass provider.ticker as the ticker_factory of
+    SimpleYahooConnector, YahooOptionsAPI or OptionsDataManager.
+    """
+    def ticker(self, symbol: str):
+        return yf.Ticker(symbol)
+
+class RecordingProvider:
+    """
+    Provider that forwards to another provider and saves every response
+    
+    Recordings are laid out as <directory>/<SYMBOL>/ with info.json,
+    options.json, chain_<expiry>_calls.csv / chain_<expiry>_puts.csv and
+    history_<period>_<interval>.csv, ready to be served by ReplayProvider.
+    """
+    def __init__(self, directory: str, provider=None):
+        self.directory = directory
+        self.provider = provider or YFinanceProvider()
+
+    def ticker(self, symbol: str):
+        return _RecordingTicker(self.provider.ticker(symbol), _symbol_directory(self.directory, symbol))
+
+class ReplayProvider:
+    """
+    Provider that serves recordings made by RecordingProvider
+    
+    Every request sleeps for `latency` seconds plus a uniform random
+    `jitter` (seeded by `seed`), so network-bound code paths can be
+    benchmarked offline and repeatably.
+    """
+    def __init__(self, directory: str, latency: float = 0.0, jitter: float = 0.0,
+                 seed: Optional[int] = None):
+        self.directory = directory
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def ticker(self, symbol: str):
+        symbol_directory = _symbol_directory(self.directory, symbol)
+        if not os.path.isdir(symbol_directory):
+            raise FileNotFoundError(f"No recording for {symbol} in {self.directory}")
+        return _ReplayTicker(symbol_directory, self._delay)
+
+    def symbols(self) -> List[str]:
+        """List the recorded symbols"""
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if os.path.isdir(os.path.join(self.directory, name))
+        )
+
+    def _delay(self):
+        delay = self.latency
+        if self.jitter:
+            with self._lock:
+                delay += self._random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+class _RecordingTicker:
+    def __init__(self, ticker, directory: str):
+        self._ticker = ticker
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def info(self) -> Dict:
+        info = self._ticker.info
+        _write_json(os.path.join(self._directory, 'info.json'), info)
+        return info
+
+    @property
+    def options(self):
+        options = self._ticker.options
+        _write_json(os.path.join(self._directory, 'options.json'), list(options))
+        return options
+
+    def option_chain(self, expiry: str):
+        chain = self._ticker.option_chain(expiry)
+        chain.calls.to_csv(_chain_path(self._directory, expiry, 'calls'), index=False)
+        chain.puts.to_csv(_chain_path(self._directory, expiry, 'puts'), index=False)
+        return chain
+
+    def history(self, period: str = '1mo', interval: str = '1d', **kwargs) -> pd.DataFrame:
+        history = self._ticker.history(period=period, interval=interval, **kwargs)
+        history.to_csv(_history_path(self._directory, period, interval))
+        return history
+
+class _ReplayTicker:
+    def __init__(self, directory: str, delay):
+        self._directory = directory
+        self._delay = delay
+
+    @property
+    def info(self) -> Dict:
+        self._delay()
+        return _read_json(os.path.join(self._directory, 'info.json'))
+
+    @property
+    def options(self):
+        self._delay()
+        return tuple(_read_json(os.path.join(self._directory, 'options.json')))
+
+    def option_chain(self, expiry: str):
+        self._delay()
+        return OptionChain(
+            calls=pd.read_csv(_chain_path(self._directory, expiry, 'calls'), float_precision='round_trip'),
+            puts=pd.read_csv(_chain_path(self._directory, expiry, 'puts'), float_precision='round_trip')
+        )
+
+    def history(self, period: str = '1mo', interval: str = '1d', **kwargs) -> pd.DataFrame:
+        self._delay()
+        return pd.read_csv(_history_path(self._directory, period, interval), index_col=0,
+                           parse_dates=True, float_precision='round_trip')
+
+def _symbol_directory(directory: str, symbol: str) -> str:
+    return os.path.join(directory, _safe_name(symbol.upper()))
+
+def _chain_path(directory: str, expiry: str, side: str) -> str:
+    return os.path.join(directory, f"chain_{_safe_name(expiry)}_{side}.csv")
+
+def _history_path(directory: str, period: str, interval: str) -> str:
+    return os.path.join(directory, f"history_{_safe_name(period)}_{_safe_name(interval)}.csv")
+
+def _safe_name(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', str(name))
+
+def _write_json(path: str, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, default=str)
+
+def _read_json(path: str):
+    with open(path) as f:
+        return json.load(f)
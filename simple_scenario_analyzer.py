@@ -5,9 +5,13 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Supported exercise styles for the batch pricers
+EXERCISE_STYLES = ('european', 'american')
+
 class SimpleScenarioAnalyzer:
-    def __init__(self, risk_free_rate=0.05):
+    def __init__(self, risk_free_rate=0.05, dividend_yield=0.0):
         self.risk_free_rate = risk_free_rate
+        self.dividend_yield = dividend_yield
     
     def black_scholes(self, S, K, T, r, sigma, option_type='call'):
         """
@@ -43,6 +47,478 @@ class SimpleScenarioAnalyzer:
             logger.error(f"Error in Black-Scholes calculation: {str(e)}")
             return 0
 
+    def black_scholes_batch(self, S, K, T, sigma, is_call, r=None, q=None):
+        """
+        Vectorized Black-Scholes price for arrays of contracts
+        
+        All arguments are broadcast against each other, so a column of spot
+        prices (shape (n, 1)) against per-contract rows (shape (m,)) prices
+        every contract at every spot in a single call.
+        
+        Args:
+            S: Stock price(s)
+            K: Strike price(s)
+            T: Time(s) to expiration in years
+            sigma: Implied volatility(ies)
+            is_call: Boolean call mask, or 'call'/'put' labels
+            r: Risk-free rate (defaults to self.risk_free_rate)
+            q: Continuous dividend yield (defaults to self.dividend_yield)
+        """
+        if r is None:
+            r = self.risk_free_rate
+        if q is None:
+            q = self.dividend_yield
+        
+        S, K, T, sigma = (np.asarray(x, dtype=float) for x in (S, K, T, sigma))
+        is_call = self._as_call_flags(is_call)
+        
+        # Expired contracts (and contracts without a usable IV) are worth intrinsic value
+        valid = (T > 0) & (sigma > 0) & (S > 0) & (K > 0)
+        safe_S = np.where(valid, S, 1.0)
+        safe_K = np.where(valid, K, 1.0)
+        safe_T = np.where(valid, T, 1.0)
+        safe_sigma = np.where(valid, sigma, 1.0)
+        
+        sqrt_T = np.sqrt(safe_T)
+        d1 = (np.log(safe_S/safe_K) + (r - q + safe_sigma**2/2)*safe_T) / (safe_sigma*sqrt_T)
+        d2 = d1 - safe_sigma*sqrt_T
+        discounted_K = K*np.exp(-r*safe_T)
+        discounted_S = S*np.exp(-q*safe_T) if q else S
+        
+        price = np.where(
+            is_call,
+            discounted_S*norm.cdf(d1) - discounted_K*norm.cdf(d2),
+            discounted_K*norm.cdf(-d2) - discounted_S*norm.cdf(-d1)
+        )
+        intrinsic = np.where(is_call, S - K, K - S)
+        price = np.where(valid, price, intrinsic)
+        
+        return np.maximum(price, 0)  # Option price cannot be negative
+
+    def price_batch(self, S, K, T, sigma, is_call, exercise_style='european'):
+        """
+        Vectorized option price with the given exercise style
+        
+        Args:
+            S, K, T, sigma, is_call: As in black_scholes_batch
+            exercise_style: 'european' (Black-Scholes) or 'american'
+                (Barone-Adesi-Whaley approximation)
+        """
+        if exercise_style == 'european':
+            return self.black_scholes_batch(S, K, T, sigma, is_call)
+        if exercise_style == 'american':
+            return self.american_price_batch(S, K, T, sigma, is_call)
+        raise ValueError(f"Unknown exercise style: {exercise_style}")
+
+    def american_price_batch(self, S, K, T, sigma, is_call, r=None, q=None, tol=1e-6, max_iter=100):
+        """
+        Vectorized Barone-Adesi-Whaley approximation of American option prices
+        
+        The critical exercise price of each contract does not depend on the
+        spot, so it is solved once (vectorized Newton iterations) on the
+        broadcast shape of K, T, sigma and is_call, and then reused for every
+        spot in S. Calls on non-dividend-paying stock and puts with r <= 0 are
+        never exercised early and get the Black-Scholes price.
+        
+        Args:
+            S, K, T, sigma, is_call: As in black_scholes_batch
+            r: Risk-free rate (defaults to self.risk_free_rate)
+            q: Continuous dividend yield (defaults to self.dividend_yield)
+            tol: Relative tolerance of the critical price iterations
+            max_iter: Maximum Newton iterations
+        """
+        if r is None:
+            r = self.risk_free_rate
+        if q is None:
+            q = self.dividend_yield
+        
+        S, K, T, sigma = (np.asarray(x, dtype=float) for x in (S, K, T, sigma))
+        is_call = self._as_call_flags(is_call)
+        european = self.black_scholes_batch(S, K, T, sigma, is_call, r=r, q=q)
+        
+        critical, coefficient, exponent, early = self._baw_exercise_boundary(
+            K, T, sigma, is_call, r, q, tol, max_iter)
+        
+        safe_critical = np.where(early, critical, 1.0)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            premium = coefficient * (S / safe_critical)**exponent
+        exercise_now = np.where(is_call, S >= critical, S <= critical)
+        intrinsic = np.maximum(np.where(is_call, S - K, K - S), 0)
+        american = np.where(exercise_now, intrinsic, european + np.where(early, premium, 0.0))
+        
+        return np.where(early, np.maximum(american, intrinsic), european)
+
+    def _baw_exercise_boundary(self, K, T, sigma, is_call, r, q, tol, max_iter):
+        """
+        Critical prices, early-exercise premium coefficients and exponents for BAW
+        
+        Returns (critical, coefficient, exponent, early) arrays on the broadcast
+        shape of the contract parameters; early flags contracts that can be
+        exercised early.
+        """
+        K, T, sigma, is_call = np.broadcast_arrays(K, T, sigma, is_call)
+        shape = K.shape
+        K, T, sigma, is_call = (x.ravel() for x in (K, T, sigma, is_call))
+        
+        b = r - q  # Cost of carry
+        early = (T > 0) & (sigma > 0) & (K > 0) & np.where(is_call, q > 0, r > 0)
+        safe_T = np.where(early, T, 1.0)
+        safe_sigma = np.where(early, sigma, 1.0)
+        safe_K = np.where(early, K, 1.0)
+        sqrt_T = np.sqrt(safe_T)
+        carry_discount = np.exp((b - r)*safe_T)
+        
+        # BAW exponents (the r -> 0 limit of M / (1 - exp(-rT)) is 2 / (sigma^2 T))
+        M = 2*r/safe_sigma**2
+        N = 2*b/safe_sigma**2
+        M_over_K = M/(1 - np.exp(-r*safe_T)) if r != 0 else 2/(safe_sigma**2*safe_T)
+        root = np.sqrt((N - 1)**2 + 4*M_over_K)
+        exponent = np.where(is_call, (-(N - 1) + root)/2, (-(N - 1) - root)/2)
+        
+        # Seed values from the perpetual option boundary
+        root_inf = np.sqrt((N - 1)**2 + 4*M)
+        exponent_inf = np.where(is_call, (-(N - 1) + root_inf)/2, (-(N - 1) - root_inf)/2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            critical_inf = safe_K/(1 - 1/exponent_inf)
+            h = np.where(
+                is_call,
+                -(b*safe_T + 2*safe_sigma*sqrt_T)*safe_K/(critical_inf - safe_K),
+                (b*safe_T - 2*safe_sigma*sqrt_T)*safe_K/(safe_K - critical_inf)
+            )
+            critical = np.where(
+                is_call,
+                safe_K + (critical_inf - safe_K)*(1 - np.exp(h)),
+                critical_inf + (safe_K - critical_inf)*np.exp(h)
+            )
+        critical = np.where(np.isfinite(critical) & (critical > 0), critical, safe_K)
+        sign = np.where(is_call, 1.0, -1.0)
+        
+        active = np.flatnonzero(early)
+        for _ in range(max_iter):
+            if active.size == 0:
+                break
+            Si, k, t, vol, call = critical[active], safe_K[active], safe_T[active], safe_sigma[active], is_call[active]
+            sg, e, cd, sq = sign[active], exponent[active], carry_discount[active], sqrt_T[active]
+            d1 = (np.log(Si/k) + (b + vol**2/2)*t)/(vol*sq)
+            value = self.black_scholes_batch(Si, k, t, vol, call, r=r, q=q)
+            # Smooth pasting: sign*(Si - K) = value + sign*(1 - cd*N(sign*d1))*Si/exponent
+            rhs = value + sg*(1 - cd*norm.cdf(sg*d1))*Si/e
+            lhs = sg*(Si - k)
+            slope = sg*cd*norm.cdf(sg*d1)*(1 - 1/e) + sg*(1 - sg*cd*norm.pdf(d1)/(vol*sq))/e
+            converged = np.abs(lhs - rhs)/k < tol
+            critical[active] = np.where(
+                converged, Si, np.where(call, (k + rhs - slope*Si)/(1 - slope), (k - rhs + slope*Si)/(1 + slope))
+            )
+            active = active[~converged]
+        
+        d1 = (np.log(critical/safe_K) + (b + safe_sigma**2/2)*safe_T)/(safe_sigma*sqrt_T)
+        coefficient = sign*(critical/exponent)*(1 - carry_discount*norm.cdf(sign*d1))
+        
+        return (critical.reshape(shape), coefficient.reshape(shape),
+                exponent.reshape(shape), early.reshape(shape))
+
+    def binomial_price(self, S, K, T, sigma, option_type='call', r=None, q=None,
+                       steps=1000, american=True):
+        """
+        Cox-Ross-Rubinstein binomial price of a single option
+        
+        Slow reference engine for validating american_price_batch; the
+        backward induction is vectorized across each time step's nodes.
+        
+        Args:
+            S, K, T, sigma: Stock price, strike, years to expiration and volatility
+            option_type: 'call' or 'put'
+            r: Risk-free rate (defaults to self.risk_free_rate)
+            q: Continuous dividend yield (defaults to self.dividend_yield)
+            steps: Number of time steps
+            american: Allow early exercise
+        """
+        if r is None:
+            r = self.risk_free_rate
+        if q is None:
+            q = self.dividend_yield
+        sign = 1.0 if option_type == 'call' else -1.0
+        if T <= 0 or sigma <= 0:
+            return max(sign*(S - K), 0)
+        
+        dt = T/steps
+        u = np.exp(sigma*np.sqrt(dt))
+        d = 1/u
+        p = (np.exp((r - q)*dt) - d)/(u - d)
+        discount = np.exp(-r*dt)
+        
+        prices = S*u**np.arange(steps, -steps - 1, -2, dtype=float)
+        values = np.maximum(sign*(prices - K), 0)
+        for _ in range(steps):
+            prices = prices[:-1]*d
+            values = discount*(p*values[:-1] + (1 - p)*values[1:])
+            if american:
+                values = np.maximum(values, sign*(prices - K))
+        return float(values[0])
+
+    def implied_volatility_batch(self, option_prices, S, K, T, is_call, r=None, q=None,
+                                 tol=1e-6, max_iter=100, sigma_bounds=(1e-4, 5.0)):
+        """
+        Invert black_scholes_batch for arrays of contracts
+        
+        Each contract keeps a bracket [low, high] around its root and takes a
+        Newton step on vega; steps that leave the bracket (or stall on a tiny
+        vega) fall back to bisection, so every contract converges or runs out
+        of iterations. Only unconverged contracts are repriced each iteration.
+        
+        Args:
+            option_prices: Observed option prices (e.g. bid/ask mids)
+            S: Stock price(s)
+            K: Strike price(s)
+            T: Time(s) to expiration in years
+            is_call: Boolean call mask, or 'call'/'put' labels
+            r: Risk-free rate (defaults to self.risk_free_rate)
+            q: Continuous dividend yield (defaults to self.dividend_yield)
+            tol: Relative price tolerance for convergence, |model - price| <
+                tol * price (floored at 1e-8), so cheap deep-OTM and near-expiry
+                contracts must match as closely as expensive ones; a contract
+                whose bracket collapses without meeting it, i.e. whose root
+                lies outside sigma_bounds, stops unconverged
+            max_iter: Maximum iterations
+            sigma_bounds: (lowest, highest) volatility searched
+        
+        Returns:
+            Dictionary with "implied_volatility" (NaN where not converged),
+            "converged" (boolean mask) and "iterations" arrays
+        """
+        if r is None:
+            r = self.risk_free_rate
+        if q is None:
+            q = self.dividend_yield
+        
+        prices, S, K, T, is_call = np.broadcast_arrays(
+            *(np.asarray(x, dtype=float) for x in (option_prices, S, K, T)),
+            self._as_call_flags(is_call)
+        )
+        shape = prices.shape
+        prices, S, K, T, is_call = (x.ravel() for x in (prices, S, K, T, is_call))
+        n = prices.size
+        
+        # Prices outside the no-arbitrage bounds have no implied volatility
+        discounted_K = K*np.exp(-r*np.maximum(T, 0))
+        discounted_S = S*np.exp(-q*np.maximum(T, 0))
+        lower = np.maximum(np.where(is_call, discounted_S - discounted_K, discounted_K - discounted_S), 0)
+        upper = np.where(is_call, discounted_S, discounted_K)
+        solvable = (
+            (T > 0) & (S > 0) & (K > 0) & np.isfinite(prices)
+            & (prices > lower) & (prices < upper)
+        )
+        
+        low = np.full(n, sigma_bounds[0])
+        high = np.full(n, sigma_bounds[1])
+        # Brenner-Subrahmanyam starting point
+        sigma = np.clip(
+            np.sqrt(2*np.pi/np.where(T > 0, T, 1.0)) * prices/np.where(S > 0, S, 1.0),
+            sigma_bounds[0], sigma_bounds[1]
+        )
+        converged = np.zeros(n, dtype=bool)
+        iterations = np.zeros(n, dtype=np.int64)
+        
+        active = np.flatnonzero(solvable)
+        for _ in range(max_iter):
+            if active.size == 0:
+                break
+            s, k, t, vol, call = S[active], K[active], T[active], sigma[active], is_call[active]
+            sqrt_t = np.sqrt(t)
+            d1 = (np.log(s/k) + (r - q + vol**2/2)*t) / (vol*sqrt_t)
+            d2 = d1 - vol*sqrt_t
+            discounted_k = k*np.exp(-r*t)
+            discounted_s = s*np.exp(-q*t)
+            model = np.where(
+                call,
+                discounted_s*norm.cdf(d1) - discounted_k*norm.cdf(d2),
+                discounted_k*norm.cdf(-d2) - discounted_s*norm.cdf(-d1)
+            )
+            vega = discounted_s*norm.pdf(d1)*sqrt_t
+            diff = model - prices[active]
+            iterations[active] += 1
+            
+            # Price increases with volatility, so the sign of diff narrows the bracket
+            high[active] = np.where(diff > 0, vol, high[active])
+            low[active] = np.where(diff < 0, vol, low[active])
+            
+            within_tol = np.abs(diff) < tol*np.maximum(prices[active], 1e-8)
+            converged[active[within_tol]] = True
+            done = within_tol | (high[active] - low[active] < 1e-10)
+            
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                newton = vol - diff/vega
+            in_bracket = (vega > 1e-12) & (newton > low[active]) & (newton < high[active])
+            sigma[active] = np.where(
+                done, vol, np.where(in_bracket, newton, (low[active] + high[active])/2)
+            )
+            active = active[~done]
+        
+        return {
+            "implied_volatility": np.where(converged, sigma, np.nan).reshape(shape),
+            "converged": converged.reshape(shape),
+            "iterations": iterations.reshape(shape)
+        }
+
+    def calculate_profit_potential_batch(self, scenario_prices, strikes, expirations,
+                                         implied_vols, option_types, current_option_prices,
+                                         exercise_style='european', current_price=None,
+                                         max_approximation_move=5.0, max_approximation_error=0.05):
+        """
+        Calculate the profit potential for a whole chain across a grid of stock prices
+        
+        When current_price is given, scenarios close to it are priced by a
+        delta-gamma expansion around current_price instead of full repricing.
+        A scenario is approximated only if its move is at most
+        max_approximation_move percent and the estimated truncation error
+        (third-order term, worst contract) is at most max_approximation_error
+        dollars per share; every other scenario is fully repriced.
+        
+        Args:
+            scenario_prices: New stock prices, shape (n_scenarios,)
+            strikes: Strike prices, shape (n_contracts,)
+            expirations: Times to expiration in years, shape (n_contracts,)
+            implied_vols: Implied volatilities, shape (n_contracts,)
+            option_types: Boolean call mask or 'call'/'put' labels, shape (n_contracts,)
+            current_option_prices: Current option prices, shape (n_contracts,)
+            exercise_style: 'european' or 'american' (see price_batch)
+            current_price: Current stock price to expand around (None to
+                fully reprice every scenario)
+            max_approximation_move: Largest move (percent) that may be approximated
+            max_approximation_error: Error bound (dollars) for approximated scenarios
+        
+        Returns:
+            Dictionary with "new_option_prices" and "percent_changes" as
+            (n_scenarios x n_contracts) arrays, and "approximated", a boolean
+            mask of the scenarios priced by the expansion
+        """
+        scenario_prices = np.asarray(scenario_prices, dtype=float).reshape(-1, 1)
+        current_option_prices = np.asarray(current_option_prices, dtype=float)
+        approximated = np.zeros(len(scenario_prices), dtype=bool)
+        
+        if not current_price:
+            new_option_prices = self.price_batch(
+                S=scenario_prices,
+                K=strikes,
+                T=expirations,
+                sigma=implied_vols,
+                is_call=option_types,
+                exercise_style=exercise_style
+            )
+        else:
+            greeks = self._spot_greeks_batch(
+                current_price, strikes, expirations, implied_vols, option_types, exercise_style)
+            moves = scenario_prices[:, 0] - current_price
+            # The third-order term estimates what the delta-gamma expansion leaves out
+            error = np.abs(moves)**3 / 6 * np.max(np.abs(greeks["speed"]), initial=0.0)
+            approximated = (np.abs(moves) / current_price * 100 <= max_approximation_move) & \
+                           (error <= max_approximation_error)
+            
+            new_option_prices = np.empty((len(scenario_prices),) + greeks["price"].shape)
+            near = moves[approximated].reshape(-1, 1)
+            new_option_prices[approximated] = np.maximum(
+                greeks["price"] + greeks["delta"]*near + greeks["gamma"]*near**2/2, 0)
+            if not approximated.all():
+                new_option_prices[~approximated] = self.price_batch(
+                    S=scenario_prices[~approximated],
+                    K=strikes,
+                    T=expirations,
+                    sigma=implied_vols,
+                    is_call=option_types,
+                    exercise_style=exercise_style
+                )
+        
+        return {
+            "new_option_prices": new_option_prices,
+            "percent_changes": self._percent_changes(new_option_prices, current_option_prices),
+            "approximated": approximated
+        }
+
+    def _spot_greeks_batch(self, S, K, T, sigma, is_call, exercise_style='european', step=1e-3):
+        """
+        Price, delta, gamma and speed at a single stock price for every contract
+        
+        Central differences over five spots (S +/- step and 2*step, relative)
+        priced in one batch, so the same code serves both exercise styles.
+        """
+        h = S*step
+        spots = S + h*np.arange(-2, 3, dtype=float).reshape(-1, 1)
+        prices = self.price_batch(spots, K, T, sigma, is_call, exercise_style=exercise_style)
+        down2, down, price, up, up2 = prices
+        
+        return {
+            "price": price,
+            "delta": (up - down) / (2*h),
+            "gamma": (up - 2*price + down) / h**2,
+            "speed": (up2 - 2*up + 2*down - down2) / (2*h**3)
+        }
+
+    def scenario_surface(self, current_price, spot_changes, iv_shifts, days_forward,
+                         strikes, expirations, implied_vols, option_types, current_option_prices,
+                         exercise_style='european'):
+        """
+        Reprice a chain over a spot x volatility x time-decay scenario grid
+        
+        The grid axes are broadcast against the contract arrays, so the whole
+        surface is priced in a single vectorized call.
+        
+        Args:
+            current_price: Current stock price
+            spot_changes: Percent changes in the stock price, shape (n_spot,)
+            iv_shifts: Absolute shifts added to each contract's IV (0.05 = +5 vol points), shape (n_iv,)
+            days_forward: Days elapsed before repricing, shape (n_days,)
+            strikes, expirations, implied_vols, option_types, current_option_prices:
+                Per-contract arrays as in calculate_profit_potential_batch, shape (n_contracts,)
+            exercise_style: 'european' or 'american' (see price_batch)
+        
+        Returns:
+            Dictionary with "new_option_prices" and "percent_changes" as
+            (n_spot x n_iv x n_days x n_contracts) arrays
+        """
+        spot_changes = np.asarray(spot_changes, dtype=float)
+        iv_shifts = np.asarray(iv_shifts, dtype=float)
+        days_forward = np.asarray(days_forward, dtype=float)
+        implied_vols = np.asarray(implied_vols, dtype=float)
+        expirations = np.asarray(expirations, dtype=float)
+        current_option_prices = np.asarray(current_option_prices, dtype=float)
+        
+        spot = (current_price * (1 + spot_changes / 100))[:, None, None, None]
+        sigma = np.maximum(implied_vols + iv_shifts[None, :, None, None], 0)
+        time_left = np.maximum(expirations - days_forward[None, None, :, None] / 365.0, 0)
+        
+        new_option_prices = self.price_batch(
+            S=spot,
+            K=strikes,
+            T=time_left,
+            sigma=sigma,
+            is_call=option_types,
+            exercise_style=exercise_style
+        )
+        
+        return {
+            "new_option_prices": new_option_prices,
+            "percent_changes": self._percent_changes(new_option_prices, current_option_prices)
+        }
+
+    @staticmethod
+    def _percent_changes(new_option_prices, current_option_prices):
+        """Percent change in option value (0 when there is no current price)"""
+        has_price = current_option_prices > 0
+        safe_current = np.where(has_price, current_option_prices, 1.0)
+        return np.where(
+            has_price,
+            (new_option_prices - current_option_prices) / safe_current * 100,
+            0.0
+        )
+
+    @staticmethod
+    def _as_call_flags(option_types):
+        """Convert 'call'/'put' labels to a boolean call mask"""
+        option_types = np.asarray(option_types)
+        if option_types.dtype == bool:
+            return option_types
+        return option_types == 'call'
+
     def calculate_profit_potential(self, current_price, new_stock_price, option_data):
         """Calculate the profit potential for an option given a new stock price"""
         try:
@@ -1,30 +1,102 @@
 import yfinance as yf
 import pandas as pd
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import logging
-from typing import Dict, List
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from simple_greeks import add_greeks
+from simple_scenario_analyzer import SimpleScenarioAnalyzer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Column layout of the per-expiration chain frames (and of the option dictionaries)
+OPTION_COLUMNS = [
+    'expiration_date', 'days_to_expiry', 'strike', 'expiration', 'implied_volatility',
+    'option_type', 'current_option_price', 'volume', 'open_interest',
+    'bid', 'ask', 'delta', 'gamma', 'theta', 'vega'
+]
+OPTION_TYPE_DTYPE = pd.CategoricalDtype(['call', 'put'])
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by all requests made through a connector
+    
+    Allows bursts of up to `burst` requests and refills at `rate` requests
+    per second. A rate of None disables limiting.
+    """
+    def __init__(self, rate: Optional[float] = None, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be made"""
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
 class SimpleYahooConnector:
-    def __init__(self):
-        pass
+    def __init__(self, max_workers: int = 8, requests_per_second: Optional[float] = None,
+                 burst: int = 8, ticker_factory: Optional[Callable[[str], object]] = None,
+                 risk_free_rate: float = 0.05, implied_volatility_from_mid: bool = False):
+        """
+        Args:
+            max_workers: Size of the worker pool used to fetch expirations in
+                parallel (1 fetches sequentially)
+            requests_per_second: Rate limit shared by all requests, None for no limit
+            burst: Number of requests allowed back to back under the rate limit
+            ticker_factory: Callable returning a yfinance.Ticker-like object for
+                a symbol (defaults to yfinance.Ticker; pass a stub for offline use)
+            risk_free_rate: Risk-free rate used for the Black-Scholes Greeks
+            implied_volatility_from_mid: Replace Yahoo's impliedVolatility and
+                lastPrice with the bid/ask mid and the IV solved from it, for
+                contracts with a two-sided quote
+        """
+        self.max_workers = max(max_workers, 1)
+        self.rate_limiter = RateLimiter(requests_per_second, burst)
+        self.ticker_factory = ticker_factory or yf.Ticker
+        self.risk_free_rate = risk_free_rate
+        self.implied_volatility_from_mid = implied_volatility_from_mid
+        self.analyzer = SimpleScenarioAnalyzer(risk_free_rate)
     
     def get_stock_price(self, ticker):
         """Get current stock price for a ticker"""
-        try:
-            logger.info(f"Fetching stock price for {ticker}")
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            price = info.get('regularMarketPrice')
-            if not price:
-                price = info.get('currentPrice')
-            logger.info(f"Retrieved price for {ticker}: {price}")
-            return price
-        except Exception as e:
-            logger.error(f"Error fetching stock price for {ticker}: {str(e)}")
-            raise Exception(f"Error fetching stock price: {str(e)}")
+        return self._fetch_stock_price(self.ticker_factory(ticker), ticker)
+
+    def get_quote_and_frames(self, ticker, max_expiry_count: int = 3) -> Tuple[float, Dict[str, pd.DataFrame]]:
+        """
+        Get the current stock price and the options frames for a ticker in one go
+        
+        The quote and every expiration are fetched in parallel through the
+        worker pool, so the whole call costs roughly two round trips (the
+        expiration list, then everything else) instead of one per request.
+        Yahoo does not provide Greeks, so they are computed from the quote.
+        
+        Returns:
+            Tuple of (stock price, dictionary of expiration date -> DataFrame)
+        """
+        stock = self.ticker_factory(ticker)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            price_future = executor.submit(self._fetch_stock_price, stock, ticker)
+            options_frames = self._fetch_options_frames(stock, ticker, max_expiry_count, executor)
+            stock_price = price_future.result()
+        return stock_price, self.add_greeks(options_frames, stock_price)
 
     def get_options_chain(self, ticker, max_expiry_count: int = 3) -> Dict[str, List[dict]]:
         """
@@ -37,88 +109,181 @@ class SimpleYahooConnector:
         Returns:
             Dictionary with expiration dates as keys and lists of option data as values
         """
+        options_frames = self.get_options_frames(ticker, max_expiry_count)
+        return {
+            expiry: options_frame_to_records(frame)
+            for expiry, frame in options_frames.items()
+        }
+
+    def get_options_frames(self, ticker, max_expiry_count: int = 3) -> Dict[str, pd.DataFrame]:
+        """
+        Get options chain for a ticker as one typed DataFrame per expiration date
+        
+        Each frame has the same columns as the dictionaries returned by
+        get_options_chain (see OPTION_COLUMNS), with calls and puts in a single
+        frame distinguished by the categorical 'option_type' column.
+        
+        Args:
+            ticker: Stock ticker symbol
+            max_expiry_count: Maximum number of expiration dates to fetch
+        
+        Returns:
+            Dictionary with expiration dates as keys and DataFrames as values
+        """
+        stock = self.ticker_factory(ticker)
+        if self.max_workers == 1:
+            stock_price = self._fetch_stock_price(stock, ticker)
+            options_frames = self._fetch_options_frames(stock, ticker, max_expiry_count)
+            return self.add_greeks(options_frames, stock_price)
+        return self.get_quote_and_frames(ticker, max_expiry_count)[1]
+
+    def get_expirations(self, ticker) -> List[str]:
+        """Get all listed expiration dates for a ticker"""
+        return self._fetch_expirations(self.ticker_factory(ticker), ticker)
+
+    def get_expiry_frame(self, ticker, expiry: str) -> pd.DataFrame:
+        """Get the chain frame for a single expiration date"""
+        try:
+            return self._fetch_expiry_frame(self.ticker_factory(ticker), ticker, expiry, datetime.now())
+        except Exception as e:
+            logger.error(f"Error fetching options chain for {ticker} {expiry}: {str(e)}")
+            raise Exception(f"Error fetching options chain: {str(e)}")
+
+    def add_greeks(self, options_frames: Dict[str, pd.DataFrame], stock_price) -> Dict[str, pd.DataFrame]:
+        """
+        Return copies of chain frames with Black-Scholes Greeks at the given
+        stock price (after re-deriving IV from mid prices when
+        implied_volatility_from_mid is set)
+        """
+        priced_frames = {}
+        for expiry, frame in options_frames.items():
+            if self.implied_volatility_from_mid and stock_price and not frame.empty:
+                frame = self._with_mid_implied_volatility(frame, stock_price)
+            priced_frames[expiry] = add_greeks(frame, stock_price, self.risk_free_rate)
+        return priced_frames
+
+    def _with_mid_implied_volatility(self, frame: pd.DataFrame, stock_price: float) -> pd.DataFrame:
+        """Copy of a chain frame priced at the bid/ask mid, with IV solved from it where it converges"""
+        bid = frame['bid'].to_numpy(dtype=float)
+        ask = frame['ask'].to_numpy(dtype=float)
+        quoted = (bid > 0) & (ask >= bid)
+        mid = np.where(quoted, (bid + ask) / 2, np.nan)
+        
+        solved = self.analyzer.implied_volatility_batch(
+            option_prices=mid,
+            S=stock_price,
+            K=frame['strike'].to_numpy(dtype=float),
+            T=frame['expiration'].to_numpy(dtype=float),
+            is_call=(frame['option_type'] == 'call').to_numpy()
+        )
+        converged = solved["converged"]
+        
+        return frame.assign(
+            implied_volatility=np.where(converged, solved["implied_volatility"], frame['implied_volatility']),
+            current_option_price=np.where(quoted, mid, frame['current_option_price'])
+        )
+
+    def _fetch_stock_price(self, stock, ticker):
+        """Fetch the current price from a ticker object"""
+        try:
+            logger.info(f"Fetching stock price for {ticker}")
+            self.rate_limiter.acquire()
+            info = stock.info
+            price = info.get('regularMarketPrice')
+            if not price:
+                price = info.get('currentPrice')
+            logger.info(f"Retrieved price for {ticker}: {price}")
+            return price
+        except Exception as e:
+            logger.error(f"Error fetching stock price for {ticker}: {str(e)}")
+            raise Exception(f"Error fetching stock price: {str(e)}")
+
+    def _fetch_options_frames(self, stock, ticker, max_expiry_count: int,
+                              executor: Optional[ThreadPoolExecutor] = None) -> Dict[str, pd.DataFrame]:
+        """Fetch the chain frames for the nearest expirations, in parallel when given an executor"""
         try:
             logger.info(f"Fetching options chain for {ticker}")
-            stock = yf.Ticker(ticker)
-            
-            # Get all expiration dates
-            expirations = stock.options
-            logger.info(f"Available expiration dates: {expirations}")
-            
-            if not expirations:
-                raise Exception("No options available for this ticker")
             
             # Limit to max_expiry_count dates
-            expirations = expirations[:max_expiry_count]
+            expirations = self._fetch_expirations(stock, ticker)[:max_expiry_count]
             
-            options_by_date = {}
             today = datetime.now()
             
-            for expiry in expirations:
-                exp_date = datetime.strptime(expiry, '%Y-%m-%d')
-                years_to_exp = (exp_date - today).days / 365.0
-                
-                # Get options chain for this expiration
-                opt = stock.option_chain(expiry)
-                
-                # Process calls and puts with volume > 0
-                calls = opt.calls[opt.calls['volume'] > 0]
-                puts = opt.puts[opt.puts['volume'] > 0]
-                
-                # Convert to list of dictionaries
-                options_list = []
-                
-                # Process calls
-                for _, row in calls.iterrows():
-                    option_data = {
-                        'expiration_date': expiry,
-                        'days_to_expiry': (exp_date - today).days,
-                        'strike': float(row['strike']),
-                        'expiration': float(years_to_exp),
-                        'implied_volatility': float(row['impliedVolatility']),
-                        'option_type': 'call',
-                        'current_option_price': float(row['lastPrice']),
-                        'volume': int(row['volume']),
-                        'open_interest': int(row['openInterest']),
-                        'bid': float(row.get('bid', 0) or 0),
-                        'ask': float(row.get('ask', 0) or 0),
-                        'delta': float(row.get('delta', 0) or 0),
-                        'gamma': float(row.get('gamma', 0) or 0),
-                        'theta': float(row.get('theta', 0) or 0),
-                        'vega': float(row.get('vega', 0) or 0)
-                    }
-                    options_list.append(option_data)
-                
-                # Process puts
-                for _, row in puts.iterrows():
-                    option_data = {
-                        'expiration_date': expiry,
-                        'days_to_expiry': (exp_date - today).days,
-                        'strike': float(row['strike']),
-                        'expiration': float(years_to_exp),
-                        'implied_volatility': float(row['impliedVolatility']),
-                        'option_type': 'put',
-                        'current_option_price': float(row['lastPrice']),
-                        'volume': int(row['volume']),
-                        'open_interest': int(row['openInterest']),
-                        'bid': float(row.get('bid', 0) or 0),
-                        'ask': float(row.get('ask', 0) or 0),
-                        'delta': float(row.get('delta', 0) or 0),
-                        'gamma': float(row.get('gamma', 0) or 0),
-                        'theta': float(row.get('theta', 0) or 0),
-                        'vega': float(row.get('vega', 0) or 0)
-                    }
-                    options_list.append(option_data)
-                
-                # Sort options by strike price and option type
-                options_list.sort(key=lambda x: (x['strike'], x['option_type']))
-                
-                # Store in dictionary
-                options_by_date[expiry] = options_list
-                logger.info(f"Retrieved {len(options_list)} options for {ticker} expiring on {expiry}")
+            def fetch_expiry(expiry):
+                return self._fetch_expiry_frame(stock, ticker, expiry, today)
+            
+            if executor is not None:
+                frames = executor.map(fetch_expiry, expirations)
+            else:
+                frames = map(fetch_expiry, expirations)
             
-            return options_by_date
+            return dict(zip(expirations, frames))
             
         except Exception as e:
             logger.error(f"Error fetching options chain for {ticker}: {str(e)}")
             raise Exception(f"Error fetching options chain: {str(e)}")
+
+    def _fetch_expirations(self, stock, ticker) -> List[str]:
+        """Fetch the listed expiration dates from a ticker object"""
+        self.rate_limiter.acquire()
+        expirations = list(stock.options)
+        logger.info(f"Available expiration dates: {expirations}")
+        
+        if not expirations:
+            raise Exception("No options available for this ticker")
+        return expirations
+
+    def _fetch_expiry_frame(self, stock, ticker, expiry: str, today: datetime) -> pd.DataFrame:
+        """Fetch and convert the chain for one expiration date"""
+        # Get options chain for this expiration
+        self.rate_limiter.acquire()
+        opt = stock.option_chain(expiry)
+        
+        frame = self._build_expiry_frame(expiry, opt.calls, opt.puts, today)
+        logger.info(f"Retrieved {len(frame)} options for {ticker} expiring on {expiry}")
+        return frame
+
+    @staticmethod
+    def _build_expiry_frame(expiry: str, calls: pd.DataFrame, puts: pd.DataFrame,
+                            today: datetime) -> pd.DataFrame:
+        """Convert Yahoo's calls/puts frames for one expiration into a typed chain frame"""
+        exp_date = datetime.strptime(expiry, '%Y-%m-%d')
+        days_to_exp = (exp_date - today).days
+        years_to_exp = days_to_exp / 365.0
+        
+        # Keep calls and puts with volume > 0
+        calls = calls[calls['volume'] > 0]
+        puts = puts[puts['volume'] > 0]
+        raw = pd.concat([calls, puts], ignore_index=True)
+
+        def column(name):
+            if name in raw.columns:
+                return pd.to_numeric(raw[name], errors='coerce').fillna(0).to_numpy(dtype=float)
+            return np.zeros(len(raw))
+        
+        frame = pd.DataFrame({
+            'expiration_date': expiry,
+            'days_to_expiry': np.full(len(raw), days_to_exp, dtype=np.int64),
+            'strike': column('strike'),
+            'expiration': np.full(len(raw), years_to_exp),
+            'implied_volatility': column('impliedVolatility'),
+            'option_type': pd.Categorical(
+                ['call'] * len(calls) + ['put'] * len(puts), dtype=OPTION_TYPE_DTYPE),
+            'current_option_price': column('lastPrice'),
+            'volume': column('volume').astype(np.int64),
+            'open_interest': column('openInterest').astype(np.int64),
+            'bid': column('bid'),
+            'ask': column('ask'),
+            'delta': column('delta'),
+            'gamma': column('gamma'),
+            'theta': column('theta'),
+            'vega': column('vega')
+        }, columns=OPTION_COLUMNS)
+        
+        # Sort options by strike price and option type
+        return frame.sort_values(['strike', 'option_type'], kind='mergesort', ignore_index=True)
+
+
+def options_frame_to_records(frame: pd.DataFrame) -> List[dict]:
+    """Convert a chain frame from get_options_frames into the list-of-dicts format"""
+    return frame.to_dict('records')
@@ -0,0 +1,122 @@
+"""
+Concurrent chain fetching in both Yahoo connectors, against a local stub provider
+
+Run from the repository root with `python -m pytest tests`.
+"""
+import importlib.util
+import os
+import sys
+import threading
+import time
+import types
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from simple_yahoo_connector import SimpleYahooConnector
+
+def load_tool_module(filename: str, name: str):
+    """Import a script from 'options pricing tool/' (hyphenated file names are not importable)"""
+    path = os.path.join(REPO_DIR, 'options pricing tool', filename)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+EXPIRY_COUNT = 12
+STRIKES = np.arange(80.0, 121.0, 5.0)
+
+class StubTicker:
+    """yfinance.Ticker stand-in with per-request latency; records the peak number of requests in flight"""
+    def __init__(self, symbol: str, latency: float = 0.02):
+        self.symbol = symbol
+        self.latency = latency
+        self.expirations = tuple(
+            (datetime.now() + timedelta(days=7 * (i + 1))).strftime('%Y-%m-%d') for i in range(EXPIRY_COUNT))
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _request(self, latency: float):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        time.sleep(latency)
+        with self._lock:
+            self.in_flight -= 1
+
+    @property
+    def info(self):
+        self._request(self.latency)
+        return {'regularMarketPrice': 100.0}
+
+    @property
+    def options(self):
+        self._request(self.latency)
+        return self.expirations
+
+    def option_chain(self, expiry: str):
+        # Later expirations answer first, so results arrive out of order
+        position = self.expirations.index(expiry)
+        self._request(self.latency * (EXPIRY_COUNT - position))
+
+        def side(offset: float):
+            return pd.DataFrame({
+                'strike': STRIKES,
+                'lastPrice': np.full(len(STRIKES), 2.0 + offset),
+                'bid': np.full(len(STRIKES), 1.9 + offset),
+                'ask': np.full(len(STRIKES), 2.1 + offset),
+                'volume': np.full(len(STRIKES), 10.0 + position),
+                'openInterest': np.full(len(STRIKES), 100.0),
+                'impliedVolatility': np.full(len(STRIKES), 0.3)
+            })
+        return types.SimpleNamespace(calls=side(0.0), puts=side(0.5))
+
+def test_simple_connector_fetches_expirations_concurrently_in_listed_order():
+    stub = StubTicker('STUB')
+    connector = SimpleYahooConnector(max_workers=8, ticker_factory=lambda symbol: stub)
+
+    stock_price, frames = connector.get_quote_and_frames('STUB', max_expiry_count=EXPIRY_COUNT)
+
+    assert stock_price == 100.0
+    assert list(frames) == list(stub.expirations)
+    assert stub.peak_in_flight > 1
+    for position, (expiry, frame) in enumerate(frames.items()):
+        assert len(frame) == 2 * len(STRIKES)
+        assert (frame['expiration_date'] == expiry).all()
+        assert (frame['volume'] == 10 + position).all()
+        assert frame[['delta', 'gamma', 'theta', 'vega']].notna().all().all()
+
+    sequential = SimpleYahooConnector(max_workers=1, ticker_factory=lambda symbol: StubTicker('STUB', 0.0))
+    for expiry, frame in sequential.get_options_frames('STUB', max_expiry_count=EXPIRY_COUNT).items():
+        pd.testing.assert_frame_equal(frame, frames[expiry])
+
+def test_yahoo_options_api_merges_expirations_concurrently_in_listed_order():
+    connector_module = load_tool_module('yahoo-finance-connector.py', 'yahoo_finance_connector')
+    stub = StubTicker('STUB')
+    api = connector_module.YahooOptionsAPI(max_workers=8, ticker_factory=lambda symbol: stub, rate_limit_delay=0)
+
+    info, chain = api.get_quote_and_chains('STUB')
+
+    assert info['regularMarketPrice'] == 100.0
+    assert stub.peak_in_flight > 1
+    assert len(chain) == EXPIRY_COUNT * 2 * len(STRIKES)
+    assert list(chain['expiration_date'].unique()) == list(stub.expirations)
+    assert chain.index.equals(pd.RangeIndex(len(chain)))
+    for position, (expiry, rows) in enumerate(chain.groupby('expiration_date', sort=False)):
+        assert list(rows['option_type']) == ['CALL'] * len(STRIKES) + ['PUT'] * len(STRIKES)
+        assert (rows['volume'] == 10 + position).all()
+        assert (rows['strike_price'].to_numpy()[:len(STRIKES)] == STRIKES).all()
+    assert chain[['delta', 'gamma', 'theta', 'vega', 'rho']].notna().all().all()
+
+    limited = connector_module.YahooOptionsAPI(
+        max_workers=2, ticker_factory=lambda symbol: StubTicker('STUB', 0.0), rate_limit_delay=0.05, burst=2)
+    start = time.perf_counter()
+    _, limited_chain = limited.get_quote_and_chains('STUB', max_expiry_count=4)
+    # Quote, expiration list and 4 expirations: 2 burst requests, then 4 more at 0.05 s each
+    assert time.perf_counter() - start >= 0.15
+    assert list(limited_chain['expiration_date'].unique()) == list(stub.expirations[:4])